@@ -17,13 +17,18 @@ def create_app(test_config=None):
         datefmt="%Y-%m-%dT%H:%M:%S%z",
     )
 
+    from . import database
+
     # create and configure the app
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_mapping(
         SECRET_KEY=os.environ.get("SECRET_KEY", "dev"),
-        SQLALCHEMY_DATABASE_URI="sqlite:///auctioneer.sqlite",
+        SQLALCHEMY_DATABASE_URI=database.get_database_uri(),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        STATIC_FOLDER=os.path.join(app.root_path, "/static"),
+        STATIC_FOLDER=os.path.join(app.root_path, "static"),
+        SCHEDULER_WAKE_ADDRESS=os.environ.get("SCHEDULER_WAKE_ADDRESS", "127.0.0.1:8765"),
+        SQLITE_PROFILE=os.environ.get("SQLITE_PROFILE", "performance"),
+        SQL_INSTRUMENTATION=os.environ.get("SQL_INSTRUMENTATION", "").lower() in ("1", "true", "yes"),
     )
 
     if test_config is None:
@@ -33,6 +38,11 @@ def create_app(test_config=None):
         # load the test config if passed in
         app.config.from_mapping(test_config)
 
+    # Pool options depend on the database the instance or test config settled on
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", database.get_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    )
+
     # ensure the instance folder exists
     try:
         os.makedirs(app.instance_path)
@@ -43,14 +53,22 @@ def create_app(test_config=None):
 
     db.init_app(app)
 
+    database.init_app(app)
+
     # All models need to be imported before setting up the database
-    from .model import AuditLog, Bid, Config, Nomination, Notification, Player, Slot, User  # noqa: F401
+    from .model import AuditLog, Bid, Config, ConfigVersion, Nomination, Notification, Player, Slot, User  # noqa: F401
 
     with app.app_context():
         db.create_all()
 
+    # Instrumentation hooks go first so they time every other request hook
+    from . import instrumentation
+
+    instrumentation.init_app(app)
+
     from . import auth
 
+    auth.init_app(app)
     app.register_blueprint(auth.bp)
 
     from . import auction
@@ -69,12 +87,18 @@ def create_app(test_config=None):
 
     admin.bp.register_blueprint(audit_log.bp)
 
+    admin.bp.register_blueprint(instrumentation.bp)
+
     app.register_blueprint(admin.bp)
 
     from . import rosters
 
     app.register_blueprint(rosters.bp)
 
+    from . import projections
+
+    projections.init_app(app)
+
     from . import tiebreaker
 
     app.register_blueprint(tiebreaker.bp)
@@ -83,18 +107,38 @@ def create_app(test_config=None):
 
     app.register_blueprint(overview.bp)
 
+    from . import search
+
+    search.init_app(app)
+    app.register_blueprint(search.bp)
+
     from . import static
 
+    static.init_app(app)
     app.register_blueprint(static.bp)
 
+    from . import scheduler
+
+    scheduler.init_app(app)
+
     from .commands import (
         close_nominations_command,
         init_db_command,
+        prune_empty_bids_command,
         send_notifications_command,
     )
+    from .benchmark import benchmark_sqlite_command
+    from .explain import explain_hot_queries_command
+    from .scheduler import run_scheduler_command
+    from .static import build_assets_command
 
     app.cli.add_command(init_db_command)
     app.cli.add_command(close_nominations_command)
     app.cli.add_command(send_notifications_command)
+    app.cli.add_command(prune_empty_bids_command)
+    app.cli.add_command(run_scheduler_command)
+    app.cli.add_command(explain_hot_queries_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(benchmark_sqlite_command)
 
     return app
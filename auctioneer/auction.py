@@ -1,4 +1,6 @@
-import math
+import csv
+import io
+import json
 from datetime import datetime
 
 import pytz
@@ -11,11 +13,12 @@ from flask import (
     redirect,
     render_template,
     request,
+    stream_with_context,
     url_for,
 )
 from werkzeug.exceptions import abort
 
-from auctioneer.tiebreaker import drop_to_tiebreaker_bottom
+from auctioneer.tiebreaker import apply_tiebreaker_orders, dropped_tiebreaker_orders
 
 from . import db
 from .audit_log import (
@@ -27,84 +30,50 @@ from .audit_log import (
     log_player_signed,
 )
 from .auth import admin_required, login_required
-from .config import get_match_time_hours, get_minimum_bid_value, get_minimum_total_salary, get_salary_cap
+from .config import get_match_time_hours, get_minimum_bid_value
 from .constants import POSITIONS, TEAMS
+from .contracts import get_contract_options_table, get_hometown_discount_bid
 from .model import Bid, Nomination, Player, Slot, User
 from .notifications import (
     add_auction_match_notification,
     add_auction_won_notification,
     add_player_nominated_notification,
     remove_auction_match_notification,
+    remove_nomination_notifications,
 )
+from .read_models import get_nominations_by_status
 from .utils import (
     get_open_slots,
+    get_bids_by_user,
     get_user_bid_for_nomination,
+    get_winning_bid,
+    get_winning_bids,
     group_slots_by_round,
+    set_user_bid,
     user_can_nominate,
 )
 
 bp = Blueprint("auction", __name__)
 
 
-def get_contract_options_by_year(minimum_total_salary):
-    """Convert MINIMUM_TOTAL_SALARY indices (1-10) to calendar years.
-
-    Returns a dict mapping calendar years to minimum salary requirements.
-    For example: {2026: 12, 2027: 30, 2028: 60, ...}
-    """
-    if not minimum_total_salary:
-        return {}
-
-    salary_cap = get_salary_cap()
-    if not salary_cap:
-        return {}
-
-    base_year = min(salary_cap.keys())
-
-    # Convert indices to calendar years
-    result = {}
-    for contract_length, min_salary in minimum_total_salary.items():
-        end_year = base_year + contract_length - 1
-        result[end_year] = min_salary
-
-    return result
-
-
 @bp.route("/")
 def index():
-    if g.user:
-        statement = db.select(Nomination, Bid).join(Bid).where(Bid.user_id == g.user.id)
-    else:
-        statement = db.select(Nomination)
-    result = db.session.execute(statement)
-
-    open_nominations = list()
-    match_nominations = list()
-    closed_nominations = list()
-
-    for row in result:
-        if row.Nomination.player.manager_id:
-            closed_nominations.append(row)
-        elif (
-            row.Nomination.slot.closes_at < datetime.utcnow()
-            and row.Nomination.player.matcher_id
-        ):
-            match_nominations.append(row)
-        else:
-            open_nominations.append(row)
-
-    def sort_key(n):
-        return n.Nomination.slot.closes_at
-
-    open_nominations = sorted(open_nominations, key=sort_key)
-    match_nominations = sorted(match_nominations, key=sort_key)
-    closed_nominations = sorted(closed_nominations, key=sort_key)
+    nominations_by_status = get_nominations_by_status(g.user.id if g.user else None)
 
     return render_template(
         "auction/index.html",
-        open_nominations=open_nominations,
-        match_nominations=match_nominations,
-        closed_nominations=closed_nominations,
+        open_nominations=nominations_by_status["open"],
+        match_nominations=nominations_by_status["match"],
+        closed_nominations=nominations_by_status["closed"],
+    )
+
+
+def available_players_statement():
+    """Select the ids of free agents that haven't been nominated."""
+    return (
+        db.select(Player.id)
+        .where(Player.manager_id.is_(None))
+        .where(~db.exists().where(Nomination.player_id == Player.id))
     )
 
 
@@ -113,14 +82,9 @@ def index():
 def nominate():
     users = db.session.execute(db.select(User)).scalars().all()
 
-    statement = (
-        db.select(Player)
-        .where(Player.manager_id.is_(None))
-        .where(~db.exists().where(Nomination.player_id == Player.id))
-        .order_by(Player.name)
-    )
-    players = db.session.execute(statement).scalars().all()
-    if not players:
+    # Players are searched from the page, so only check that some are left
+    available_players = available_players_statement()
+    if not db.session.execute(db.select(available_players.exists())).scalar():
         flash("No available players remaining to nominate.")
 
     no_slots_message = (
@@ -145,6 +109,10 @@ def nominate():
             error = max_nominations_reached_message
         elif not player_id:
             error = "Player is required."
+        elif not player_id.isdigit() or not db.session.execute(
+            db.select(available_players.where(Player.id == int(player_id)).exists())
+        ).scalar():
+            error = "Player is not available to nominate."
         elif not bid_value:
             error = "Bid value is required."
 
@@ -169,12 +137,11 @@ def nominate():
                 slot_id=slot_id,
                 nominator_id=g.user.id,
             )
-            for user in users:
-                user_bid_value = bid_value if user.id == g.user.id else None
-                user.bids.append(Bid(nomination=nomination, value=user_bid_value))
+            # Only real bids are stored, so the nominator's is the only one to start
+            nomination.bids.append(Bid(user_id=g.user.id, value=int(bid_value)))
 
             db.session.add(nomination)
-            db.session.add_all(users)
+            db.session.flush()
 
             # Log audit event
             log_nomination(nomination, g.user)
@@ -189,23 +156,14 @@ def nominate():
 
             return redirect(url_for("auction.index"))
 
-    # Calculate reference table for minimum contracts
-    minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
-    min_contracts = {}
-    if minimum_total_salary:
-        last_year = list(minimum_total_salary)[0] - 1
-        for year, min_salary in minimum_total_salary.items():
-            min_contracts[year] = {
-                'total': min_salary,
-                'annual': math.ceil(min_salary / (year - last_year))
-            }
+    # Reference table for minimum contracts
+    min_contracts = get_contract_options_table().min_contracts
 
     return render_template(
         "auction/nominate.html",
         teams=TEAMS,
         positions=POSITIONS,
         users=users,
-        players=players,
         min_contracts=min_contracts,
     )
 
@@ -218,8 +176,7 @@ def bid(nomination_id):
         abort(404, f"Nomination for id {nomination_id} doesn't exist.")
 
     user_bid = get_user_bid_for_nomination(g.user.id, nomination.id)
-    if not user_bid.value:
-        user_bid.value = ""
+    old_value = user_bid.value if user_bid else None
 
     if datetime.utcnow() > nomination.slot.closes_at:
         flash("Auction has closed.")
@@ -250,9 +207,7 @@ def bid(nomination_id):
             )
             flash(error)
         else:
-            old_value = user_bid.value if user_bid.value != "" else None
-            user_bid.value = value
-            db.session.add(user_bid)
+            set_user_bid(g.user.id, nomination.id, int(value) if value is not None else None)
 
             # Log audit event (sensitive)
             log_bid(nomination, g.user, old_value, value)
@@ -263,18 +218,15 @@ def bid(nomination_id):
             )
             return redirect(url_for("auction.index"))
 
-    # Calculate reference table for minimum contracts
-    minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
-    min_contracts = {}
-    if minimum_total_salary:
-        last_year = list(minimum_total_salary)[0] - 1
-        for year, min_salary in minimum_total_salary.items():
-            min_contracts[year] = {
-                'total': min_salary,
-                'annual': math.ceil(min_salary / (year - last_year))
-            }
+    # Reference table for minimum contracts
+    min_contracts = get_contract_options_table().min_contracts
 
-    return render_template("auction/bid.html", nomination=nomination, bid=user_bid, min_contracts=min_contracts)
+    return render_template(
+        "auction/bid.html",
+        nomination=nomination,
+        bid_value=old_value if old_value is not None else "",
+        min_contracts=min_contracts,
+    )
 
 
 @bp.route("/<int:nomination_id>/match/", methods=["GET", "POST"])
@@ -284,21 +236,20 @@ def match(nomination_id):
     if g.user.id != nomination.player.matcher_id:
         abort(403)
 
+    winning_bid = get_winning_bid(nomination.id)
+    winning_bid_value = winning_bid.value if winning_bid else 0
+
     if request.method == "POST":
         is_match = request.form["match"] == "yes"
         if is_match:
-            user_bid = get_user_bid_for_nomination(g.user.id, nomination.id)
-
             # Apply hometown discount if applicable
             if nomination.player.hometown_discount:
-                discounted_value = math.ceil(nomination.bids[0].value * 0.9)
-                # Enforce minimum bid value
-                user_bid.value = max(discounted_value, get_minimum_bid_value())
+                matched_value = get_hometown_discount_bid(winning_bid_value, get_minimum_bid_value())
             else:
-                user_bid.value = nomination.bids[0].value
+                matched_value = winning_bid_value
 
+            set_user_bid(g.user.id, nomination.id, matched_value)
             nomination.player.manager_id = g.user.id
-            db.session.add(user_bid)
             db.session.add(nomination)
 
             # Log audit event (sensitive)
@@ -320,21 +271,19 @@ def match(nomination_id):
             )
 
         # assign_nominated_player_to_team(nomination)
-        add_auction_won_notification(nomination)
+        add_auction_won_notification(nomination, winning_bid_value)
 
         return redirect(url_for("auction.index"))
 
     # Calculate discounted bid value for display
-    winning_bid = nomination.bids[0].value if nomination.bids else 0
     discounted_bid = None
-    if nomination.player.hometown_discount and winning_bid:
-        discounted_value = math.ceil(winning_bid * 0.9)
-        discounted_bid = max(discounted_value, get_minimum_bid_value())
+    if nomination.player.hometown_discount and winning_bid_value:
+        discounted_bid = get_hometown_discount_bid(winning_bid_value, get_minimum_bid_value())
 
     return render_template(
         "auction/match.html",
         nomination=nomination,
-        winning_bid=winning_bid,
+        winning_bid=winning_bid_value,
         discounted_bid=discounted_bid
     )
 
@@ -353,8 +302,8 @@ def edit(nomination_id):
         action = request.form["action"]
 
         if action.lower() == "delete":
-            if nomination.player.matcher_id:
-                remove_auction_match_notification(nomination)
+            # Free the nomination's dedupe keys, as its id may be handed out again
+            remove_nomination_notifications(nomination)
             if nomination.player.manager_id:
                 unassign_nominated_player_to_team(nomination)
             nomination_str = str(nomination)
@@ -443,17 +392,11 @@ def sign(player_id):
     # Not sure why player.nomination returns a list, but it should always be len 1 so
     # this should be fine.
     user_bid = get_user_bid_for_nomination(g.user.id, player.nomination[0].id)
-    minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
-    last_year = list(minimum_total_salary)[0] - 1
-
-    # Apply hometown discount to minimum salary requirements if applicable
-    if player.hometown_discount:
-        minimum_total_salary = {year: round(salary * 0.9) for year, salary in minimum_total_salary.items()}
-
-    options = dict()
-    for year, salary in minimum_total_salary.items():
-        if user_bid.value >= salary:
-            options[year] = math.ceil(user_bid.value / (year - last_year))
+    if user_bid is None:
+        abort(403)
+    # Minimum salary requirements have the hometown discount applied if applicable
+    contract_options = get_contract_options_table(player.hometown_discount)
+    options = contract_options.options(user_bid.value)
 
     if request.method == "POST":
         contract = request.form["contract"] or None
@@ -492,19 +435,11 @@ def sign(player_id):
             )
             return redirect(url_for("rosters.index"))
 
-    # Calculate reference table for minimum contracts (already has HTD applied if applicable)
-    min_contracts = {}
-    for year, min_salary in minimum_total_salary.items():
-        min_contracts[year] = {
-            'total': min_salary,
-            'annual': math.ceil(min_salary / (year - last_year))
-        }
-
     return render_template(
         "auction/sign.html",
         player=player,
         options=options,
-        min_contracts=min_contracts,
+        min_contracts=contract_options.min_contracts,
         user_bid=user_bid.value
     )
 
@@ -521,6 +456,14 @@ def admin_sign(player_id):
     # Get all users for manager selection
     users = db.session.execute(db.select(User).order_by(User.team_name)).scalars().all()
 
+    # Minimum salary requirements have the hometown discount applied if applicable
+    contract_options = get_contract_options_table(player.hometown_discount)
+
+    # Every manager's bid for the player, loaded in one query
+    bids = dict()
+    if player.nomination:
+        bids = get_bids_by_user([player.nomination[0].id]).get(player.nomination[0].id, {})
+
     if request.method == "POST":
         manager_id = request.form.get("manager_id")
         contract = request.form.get("contract")
@@ -544,24 +487,13 @@ def admin_sign(player_id):
             if not player.nomination:
                 error = "Player has no associated nomination."
             else:
-                user_bid = get_user_bid_for_nomination(manager_id, player.nomination[0].id)
+                user_bid = bids.get(manager_id)
                 if not user_bid:
                     error = "Selected manager has no bid for this player."
 
         if not error:
             # Calculate contract options based on bid value
-            minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
-            last_year = list(minimum_total_salary)[0] - 1
-
-            # Apply hometown discount to minimum salary requirements if applicable
-            if player.hometown_discount:
-                minimum_total_salary = {year: round(salary * 0.9) for year, salary in minimum_total_salary.items()}
-
-            options = dict()
-            for year, salary in minimum_total_salary.items():
-                if user_bid.value >= salary:
-                    options[year] = math.ceil(user_bid.value / (year - last_year))
-
+            options = contract_options.options(user_bid.value)
             if contract not in options:
                 error = "Invalid contract option for this bid value."
 
@@ -589,115 +521,206 @@ def admin_sign(player_id):
 
     # Calculate contract options for display (if player has nomination)
     contract_options_by_user = {}
-    minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
-    last_year = list(minimum_total_salary)[0] - 1
-
-    # Apply hometown discount to minimum salary requirements if applicable
-    if player.hometown_discount:
-        minimum_total_salary = {year: round(salary * 0.9) for year, salary in minimum_total_salary.items()}
-
-    if player.nomination:
-        for user in users:
-            user_bid = get_user_bid_for_nomination(user.id, player.nomination[0].id)
-            if user_bid:
-                options = dict()
-                for year, salary in minimum_total_salary.items():
-                    if user_bid.value >= salary:
-                        options[year] = math.ceil(user_bid.value / (year - last_year))
-                contract_options_by_user[user.id] = {
-                    "bid": user_bid.value,
-                    "options": options
-                }
-
-    # Calculate reference table for minimum contracts
-    min_contracts = {}
-    for year, min_salary in minimum_total_salary.items():
-        min_contracts[year] = {
-            'total': min_salary,
-            'annual': math.ceil(min_salary / (year - last_year))
-        }
+    for user in users:
+        user_bid = bids.get(user.id)
+        if user_bid:
+            contract_options_by_user[user.id] = {
+                "bid": user_bid.value,
+                "options": contract_options.options(user_bid.value),
+            }
 
     return render_template(
         "auction/admin_sign.html",
         player=player,
         users=users,
         contract_options=contract_options_by_user,
-        min_contracts=min_contracts
+        min_contracts=contract_options.min_contracts
+    )
+
+
+# Result rows fetched from the database per round trip while streaming
+RESULTS_BATCH_SIZE = 500
+
+RESULTS_HEADERS = [
+    "Fantrax ID",
+    "Round",
+    "Player",
+    "Team",
+    "Position",
+    "Winner",
+    "Salary",
+    "Contract",
+    "Bids",
+]
+
+
+def get_bid_values_subquery():
+    """Get a subquery of each nomination's bid values joined with ";", highest first."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+        values = db.func.string_agg(db.cast(Bid.value, db.String), aggregate_order_by(";", Bid.value.desc()))
+        return (
+            db.select(Bid.nomination_id, values.label("bid_values"))
+            .where(Bid.value.is_not(None))
+            .group_by(Bid.nomination_id)
+            .subquery()
+        )
+
+    # group_concat keeps the order of the rows it's given
+    ordered_bids = (
+        db.select(Bid.nomination_id, Bid.value)
+        .where(Bid.value.is_not(None))
+        .order_by(Bid.nomination_id, Bid.value.desc())
+        .subquery()
+    )
+    return (
+        db.select(ordered_bids.c.nomination_id, db.func.group_concat(ordered_bids.c.value, ";").label("bid_values"))
+        .group_by(ordered_bids.c.nomination_id)
+        .subquery()
     )
 
 
 @bp.route("/results/")
 @login_required
 def results():
-    def generate(headers, rows):
-        yield ",".join(headers) + "\n"
-        for row in rows:
-            yield ",".join(row) + "\n"
+    """Download the won auctions as CSV, or JSON Lines with ?format=jsonl.
+
+    Rows are streamed from the database in batches as the response is written,
+    so memory use and time to first byte don't grow with the number of results.
+    """
+    output_format = request.args.get("format", "csv")
+    if output_format not in ("csv", "jsonl"):
+        abort(400, f"Unknown results format {output_format}.")
 
-    nominations = db.session.execute(
-        db.select(Nomination)
+    bid_values = get_bid_values_subquery()
+    statement = (
+        db.select(
+            Player.fantrax_id,
+            Slot.round,
+            Player.name,
+            Player.team,
+            Player.position,
+            User.team_name,
+            Player.salary,
+            Player.contract,
+            bid_values.c.bid_values,
+        )
+        .select_from(Nomination)
         .join(Player, Nomination.player_id == Player.id)
         .join(Slot, Nomination.slot_id == Slot.id)
-        .where(Player.manager_id.is_not(None))
+        .join(User, Player.manager_id == User.id)
+        .outerjoin(bid_values, bid_values.c.nomination_id == Nomination.id)
         .order_by(Slot.closes_at.asc())
+        .execution_options(yield_per=RESULTS_BATCH_SIZE)
     )
-    results_headers = [
-        "Fantrax ID",
-        "Round",
-        "Player",
-        "Team",
-        "Position",
-        "Winner",
-        "Salary",
-        "Contract",
-        "Bids",
-    ]
-    results_rows = [
-        [
-            nomination.player.fantrax_id,
-            str(nomination.slot.round),
-            nomination.player.name,
-            nomination.player.team,
-            nomination.player.position.replace(",", ";"),
-            nomination.player.manager_user.team_name,
-            str(nomination.player.salary),
-            str(nomination.player.contract),
-            ";".join([str(b.value) for b in nomination.bids]),
-        ]
-        for nomination in nominations.scalars()
-    ]
+
+    def generate_csv(rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(RESULTS_HEADERS)
+        for row in rows:
+            writer.writerow(
+                [
+                    row.fantrax_id,
+                    row.round,
+                    row.name,
+                    row.team,
+                    row.position.replace(",", ";"),
+                    row.team_name,
+                    row.salary,
+                    row.contract,
+                    row.bid_values or "",
+                ]
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    def generate_jsonl(rows):
+        for row in rows:
+            yield json.dumps(
+                {
+                    "fantrax_id": row.fantrax_id,
+                    "round": row.round,
+                    "player": row.name,
+                    "team": row.team,
+                    "position": row.position.split(","),
+                    "winner": row.team_name,
+                    "salary": row.salary,
+                    "contract": row.contract,
+                    "bids": [int(value) for value in row.bid_values.split(";")] if row.bid_values else [],
+                }
+            ) + "\n"
+
+    def generate():
+        rows = db.session.execute(statement)
+        if output_format == "jsonl":
+            yield from generate_jsonl(rows)
+        else:
+            yield from generate_csv(rows)
+
     current_app.logger.info(f"Results downloaded by {g.user}.")
 
+    if output_format == "jsonl":
+        mimetype = "application/x-ndjson"
+        filename = "the-doo-auction-results.jsonl"
+    else:
+        mimetype = "text/csv"
+        filename = "the-doo-auction-results.csv"
+
     return Response(
-        generate(results_headers, results_rows),
-        mimetype="text/csv",
+        stream_with_context(generate()),
+        mimetype=mimetype,
         headers={
-            "Content-Disposition": 'attachment; filename="the-doo-auction-results.csv"'
+            "Content-Disposition": f'attachment; filename="{filename}"'
         },
     )
 
 
-def close_nomination(nomination):
-    winning_bid_value = nomination.bids[0].value
-    winning_users = list()
-    for bid in nomination.bids:
-        if bid.value == winning_bid_value:
-            winning_users.append(bid.user)
-
-    if len(winning_users) > 1:
-        winning_user = winning_users[0]
-        for user in winning_users[1:]:
-            if (
-                user.tiebreaker_order is not None
-                and user.tiebreaker_order < winning_user.tiebreaker_order
-            ):
-                winning_user = user
-        drop_to_tiebreaker_bottom(winning_user)
-    else:
-        winning_user = winning_users[0]
+def settle_nominations(nominations):
+    """Assign the winner of each nomination within the current transaction.
 
-    nomination.player.manager_id = winning_user.id
-    db.session.add(nomination)
+    Nominations are settled in the order given, applying the tiebreaker drop for
+    each tied auction before the next one is settled, exactly as if they had been
+    closed one at a time. Nothing is committed.
+
+    Returns a dict of nomination id -> winning bid value for the settled nominations.
+    """
+    if not nominations:
+        return {}
+
+    users = db.session.execute(db.select(User)).scalars().all()
+    users_by_id = {user.id: user for user in users}
+    orders = {user.id: user.tiebreaker_order for user in users}
+    winning_bids = get_winning_bids([nomination.id for nomination in nominations])
+
+    winning_bid_values = dict()
+    for nomination in nominations:
+        if nomination.id not in winning_bids:
+            current_app.logger.warning(f"Nomination {nomination} has no bids to settle.")
+            continue
+
+        winning_bid_value = winning_bids[nomination.id].value
+        tied_user_ids = winning_bids[nomination.id].user_ids
+        if len(tied_user_ids) > 1:
+            ranked_user_ids = [uid for uid in tied_user_ids if orders[uid] is not None]
+            winning_user_id = min(ranked_user_ids, key=orders.get) if ranked_user_ids else tied_user_ids[0]
+            orders = dropped_tiebreaker_orders(orders, winning_user_id)
+        else:
+            winning_user_id = tied_user_ids[0]
+
+        nomination.player.manager_user = users_by_id[winning_user_id]
+        winning_bid_values[nomination.id] = winning_bid_value
+
+    apply_tiebreaker_orders(users, orders)
+    db.session.flush()
+
+    return winning_bid_values
+
+
+def close_nomination(nomination):
+    settle_nominations([nomination])
     db.session.commit()
 
 
@@ -12,6 +12,25 @@ from .model import AuditLog, User
 bp = Blueprint("audit_log", __name__, url_prefix="/audit")
 
 
+def audit_log_statements(entity_type, user_id, show_sensitive):
+    """Build the audit log query and its count query with filters applied."""
+    query = db.select(AuditLog).order_by(desc(AuditLog.created_at))
+    total_query = db.select(db.func.count()).select_from(AuditLog)
+
+    # Apply filters
+    if entity_type:
+        query = query.where(AuditLog.entity_type == entity_type)
+        total_query = total_query.where(AuditLog.entity_type == entity_type)
+    if user_id:
+        query = query.where(AuditLog.user_id == int(user_id))
+        total_query = total_query.where(AuditLog.user_id == int(user_id))
+    if not show_sensitive:
+        query = query.where(AuditLog.is_sensitive == False)
+        total_query = total_query.where(AuditLog.is_sensitive == False)
+
+    return query, total_query
+
+
 @bp.route("/")
 @login_required
 @admin_required
@@ -24,26 +43,9 @@ def index():
     page = int(request.args.get('page', 1))
     per_page = 50
 
-    # Build query
-    query = db.select(AuditLog).order_by(desc(AuditLog.created_at))
-
-    # Apply filters
-    if entity_type:
-        query = query.where(AuditLog.entity_type == entity_type)
-    if user_id:
-        query = query.where(AuditLog.user_id == int(user_id))
-    if not show_sensitive:
-        query = query.where(AuditLog.is_sensitive == False)
+    query, total_query = audit_log_statements(entity_type, user_id, show_sensitive)
 
     # Paginate
-    total_query = db.select(db.func.count()).select_from(AuditLog)
-    if entity_type:
-        total_query = total_query.where(AuditLog.entity_type == entity_type)
-    if user_id:
-        total_query = total_query.where(AuditLog.user_id == int(user_id))
-    if not show_sensitive:
-        total_query = total_query.where(AuditLog.is_sensitive == False)
-
     total = db.session.execute(total_query).scalar()
     total_pages = max(1, (total + per_page - 1) // per_page)
 
@@ -232,6 +234,23 @@ def log_csv_import(player_count, user=None):
     )
 
 
+def log_csv_update(counts, user=None):
+    """Log a CSV import that updated the existing players."""
+    description = (
+        f"Updated players from CSV: {counts['inserted']} added, {counts['updated']} updated, "
+        f"{counts['deleted']} deleted"
+    )
+    log_audit(
+        action='update',
+        entity_type='import',
+        entity_id=None,
+        description=description,
+        new_values=counts,
+        is_sensitive=False,
+        user=user
+    )
+
+
 def log_tiebreaker_update(user_id, old_order, new_order, admin_user=None):
     """Log a tiebreaker order update."""
     from .model import User
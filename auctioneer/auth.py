@@ -1,4 +1,6 @@
 import functools
+import threading
+import time
 
 from flask import (
     Blueprint,
@@ -10,14 +12,68 @@ from flask import (
     session,
     url_for,
 )
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.exceptions import abort
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from . import db
+from .database import on_commit_of
 from .model import User
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+# Other processes' edits to a user (e.g. a team rename) show up after at most this long
+USER_CACHE_TTL_SECONDS = 30
+
+# Endpoints whose views never look at g.user: Flask's own static route and the
+# static blueprint's
+ANONYMOUS_ENDPOINTS = {"static", "static.staticfiles"}
+
+# Columns kept in the user cache; the password hash is left to load on access
+_cached_columns = None
+_user_cache = dict()  # user id -> (cached_at, column values)
+_user_cache_lock = threading.Lock()
+
+
+def init_app(app):
+    """Clear the user cache after this process commits user changes."""
+    on_commit_of({User.__tablename__}, invalidate_user_cache)
+
+
+def invalidate_user_cache():
+    """Drop every cached user so they are reloaded on their next request."""
+    with _user_cache_lock:
+        _user_cache.clear()
+
+
+def _get_cached_columns():
+    global _cached_columns
+
+    if _cached_columns is None:
+        _cached_columns = [attr.key for attr in db.inspect(User).column_attrs if attr.key != "password"]
+    return _cached_columns
+
+
+def get_cached_user(user_id):
+    """Get a user by id, from this process's cache when it's fresh.
+
+    A cached user is attached to the current session without a query, so it
+    behaves like one loaded with db.session.get. Returns None if the user
+    doesn't exist.
+    """
+    entry = _user_cache.get(user_id)
+    if entry is not None and time.monotonic() - entry[0] < USER_CACHE_TTL_SECONDS:
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        values = {key: getattr(user, key) for key in _get_cached_columns()}
+        with _user_cache_lock:
+            _user_cache[user_id] = (time.monotonic(), values)
+    return user
+
 
 @bp.route("/register", methods=("GET", "POST"))
 def register():
@@ -104,10 +160,10 @@ def login():
 def load_logged_in_user():
     user_id = session.get("user_id")
 
-    if user_id is None:
+    if user_id is None or request.endpoint in ANONYMOUS_ENDPOINTS:
         g.user = None
     else:
-        g.user = db.session.get(User, user_id)
+        g.user = get_cached_user(user_id)
 
 
 @bp.route("/logout")
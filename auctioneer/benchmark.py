@@ -0,0 +1,136 @@
+"""Write contention benchmark for the SQLite profiles.
+
+Simulates the last seconds of an auction: several processes (standing in for
+gunicorn workers) repeatedly read a nomination's bids, as the auction page
+does, and then update a manager's bid, as the bid view does. Each profile runs
+against its own scratch database, so the app's database is never touched.
+"""
+
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+
+from . import db
+from .database import SQLITE_PROFILES, get_sqlite_pragmas, listen_for_sqlite_connections
+from .model import Bid, Nomination, Player, Slot, User
+
+NOMINATION_ID = 1
+
+
+def _seed(engine, teams):
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(
+            db.insert(User),
+            [
+                {"id": i, "team_name": f"Team {i}", "short_team_name": f"T{i}", "tiebreaker_order": i}
+                for i in range(1, teams + 1)
+            ],
+        )
+        connection.execute(
+            db.insert(Player).values(id=1, fantrax_id="benchmark", name="Benchmark Player", team="FA", position="SP")
+        )
+        connection.execute(
+            db.insert(Slot).values(
+                id=1, round=1, closes_at=now + timedelta(hours=1), nomination_opens_at=now, nomination_closes_at=now
+            )
+        )
+        connection.execute(db.insert(Nomination).values(id=NOMINATION_ID, player_id=1, slot_id=1, nominator_id=1))
+
+
+def _bid_worker(args):
+    path, pragmas, worker, teams, bids = args
+    engine = create_engine(f"sqlite:///{path}")
+    listen_for_sqlite_connections(engine, pragmas)
+
+    latencies = list()
+    failures = 0
+    for i in range(bids):
+        user_id = (worker + i) % teams + 1
+        started_at = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    db.select(Bid.user_id, Bid.value).where(Bid.nomination_id == NOMINATION_ID)
+                ).all()
+            # Same statement as utils.set_user_bid
+            statement = sqlite.insert(Bid).values(user_id=user_id, nomination_id=NOMINATION_ID, value=worker + i)
+            with engine.begin() as connection:
+                connection.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[Bid.user_id, Bid.nomination_id], set_={"value": statement.excluded.value}
+                    )
+                )
+        except OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            failures += 1
+        else:
+            latencies.append(time.perf_counter() - started_at)
+
+    engine.dispose()
+    return latencies, failures
+
+
+def run_benchmark(profile, workers, bids, teams):
+    """Run the bid workload against a scratch database with a SQLite profile.
+
+    Returns a dict with the number of bids attempted, lock failures, p50 and
+    p99 latency in milliseconds and successful bids per second.
+    """
+    pragmas = get_sqlite_pragmas(profile)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite")
+        engine = create_engine(f"sqlite:///{path}")
+        listen_for_sqlite_connections(engine, pragmas)
+        _seed(engine, teams)
+        engine.dispose()
+
+        started_at = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_bid_worker, [(path, pragmas, worker, teams, bids) for worker in range(workers)])
+        seconds = time.perf_counter() - started_at
+
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    failures = sum(worker_failures for _, worker_failures in results)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+    return {
+        "bids": workers * bids,
+        "failures": failures,
+        "p50_ms": percentiles[49] * 1000 if percentiles else None,
+        "p99_ms": percentiles[98] * 1000 if percentiles else None,
+        "bids_per_second": len(latencies) / seconds,
+    }
+
+
+@click.command("benchmark-sqlite")
+@click.option("--workers", default=8, show_default=True, help="Concurrent bidding processes.")
+@click.option("--bids", default=200, show_default=True, help="Bids per process.")
+@click.option("--teams", default=14, show_default=True, help="Teams bidding on the nomination.")
+@click.option(
+    "--profile",
+    "profiles",
+    multiple=True,
+    type=click.Choice(list(SQLITE_PROFILES)),
+    help="Profiles to compare (default: all).",
+)
+def benchmark_sqlite_command(workers, bids, teams, profiles):
+    """Compare bid latency and lock failures under concurrent writes for each SQLite profile."""
+    for profile in profiles or SQLITE_PROFILES:
+        result = run_benchmark(profile, workers, bids, teams)
+        p50 = f"{result['p50_ms']:.1f}ms" if result["p50_ms"] is not None else "--"
+        p99 = f"{result['p99_ms']:.1f}ms" if result["p99_ms"] is not None else "--"
+        click.echo(
+            f"{profile}: {result['bids']} bids, {result['failures']} lock failures, "
+            f"p50 {p50}, p99 {p99}, {result['bids_per_second']:.0f} bids/s"
+        )
@@ -1,17 +1,20 @@
 import json
 import os
+import time
 from datetime import datetime, timedelta
 
 import click
 from flask import current_app
+from sqlalchemy.orm import contains_eager
 
 from . import db
-from .auction import close_nomination
-from .config import get_config
-from .model import Config, Nomination, Notification, Player, Slot
-from .slack import add_auction_won_notification
-from .slack import send_notification as send_slack_notification
-from .discord import send_notification as send_discord_notification
+from .auction import settle_nominations
+from .config import bump_config_version, get_config, get_notification_digest_seconds
+from .database import mark_tables_changed
+from .model import Bid, Config, Nomination, Notification, Player, Slot
+from .notifications import DIGEST_KINDS, build_auction_won_notification
+from .delivery import deliver
+from . import discord, slack
 from .utils import players_from_fantrax_export, users_from_file
 
 
@@ -27,6 +30,8 @@ def init_db():
     )
 
     with current_app.app_context():
+        # Release this session's connection first; Postgres won't drop tables it has open
+        db.session.remove()
         db.drop_all()
         db.create_all()
 
@@ -111,6 +116,12 @@ def init_db():
             description="Minutes before an event to send alert notifications",
             value_type="int",
         ),
+        Config(
+            key="NOTIFICATION_DIGEST_SECONDS",
+            value="60",
+            description="Seconds to hold nomination and auction won notifications so they are sent as one message",
+            value_type="int",
+        ),
         Config(
             key="SLACK_WEBHOOK_URL",
             value=os.environ.get("SLACK_WEBHOOK_URL", os.environ.get("WEBHOOK_URL", "")),
@@ -132,6 +143,9 @@ def init_db():
     ]
     db.session.add_all(configs)
 
+    # Seed the version from the clock so workers that cached the old config reload
+    bump_config_version(seed=int(time.time()))
+
     db.session.commit()
 
 
@@ -142,10 +156,41 @@ def init_db_command():
     click.echo(f"{datetime.utcnow().isoformat()}: Initialized the database.")
 
 
-def close_nominations():
-    current_datetime = datetime.utcnow()
-    match_datetime = current_datetime - timedelta(days=1)
-    statement = (
+def prune_empty_bids():
+    """Delete placeholder bids and all but the latest of a user's bids on a nomination.
+
+    Both were left behind by older versions. Duplicates must be gone before the
+    unique (user_id, nomination_id) index in migrations/add_unique_bid_index.sql
+    can be created.
+
+    Returns the number of empty and duplicate bids deleted.
+    """
+    empty = db.session.execute(db.delete(Bid).where(Bid.value.is_(None))).rowcount
+    latest = db.select(db.func.max(Bid.id)).group_by(Bid.user_id, Bid.nomination_id)
+    duplicates = db.session.execute(
+        db.delete(Bid).where(Bid.id.not_in(latest)).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    return empty, duplicates
+
+
+@click.command("prune-empty-bids")
+def prune_empty_bids_command():
+    """Delete the empty and duplicate bids created by older versions."""
+    empty, duplicates = prune_empty_bids()
+    click.echo(f"{datetime.utcnow().isoformat()}: Deleted {empty} empty and {duplicates} duplicate bids.")
+
+
+# How long a matcher has to respond after an auction closes before it is closed
+MATCH_WINDOW = timedelta(days=1)
+
+
+def due_nominations_statement(current_datetime):
+    """Select the unsettled nominations whose auction, or match window, has ended."""
+    match_datetime = current_datetime - MATCH_WINDOW
+
+    return (
         db.select(Nomination)
         .join(Slot)
         .join(Player, Nomination.player_id == Player.id)
@@ -154,13 +199,45 @@ def close_nominations():
             (Player.matcher_id.is_(None) & (current_datetime > Slot.closes_at))
             | (Player.matcher_id.is_not(None) & (match_datetime > Slot.closes_at))
         )
+        .options(contains_eager(Nomination.player), contains_eager(Nomination.slot))
+        .order_by(Slot.closes_at, Nomination.id)
     )
+
+
+def close_nominations():
+    statement = due_nominations_statement(datetime.utcnow())
     nominations = db.session.execute(statement).scalars().all()
-    for nomination in nominations:
-        close_nomination(nomination)
-        add_auction_won_notification(nomination)
 
-    return nominations
+    # Settle everything due in one transaction, in the order the auctions closed
+    winning_bid_values = settle_nominations(nominations)
+    closed_nominations = [nomination for nomination in nominations if nomination.id in winning_bid_values]
+    notifications = [
+        build_auction_won_notification(nomination, winning_bid_values[nomination.id])
+        for nomination in closed_nominations
+    ]
+    # Replace unsent won notifications left over from an earlier close of the same
+    # auction, but never resend one that was already delivered
+    if notifications:
+        dedupe_keys = [notification.dedupe_key for notification in notifications]
+        sent_keys = set(
+            db.session.execute(
+                db.select(Notification.dedupe_key)
+                .where(Notification.dedupe_key.in_(dedupe_keys))
+                .where(Notification.sent.is_(True))
+            ).scalars()
+        )
+        db.session.execute(
+            db.delete(Notification)
+            .where(Notification.dedupe_key.in_(dedupe_keys))
+            .where(Notification.sent.is_(False))
+        )
+        notifications = [notification for notification in notifications if notification.dedupe_key not in sent_keys]
+    db.session.bulk_save_objects(notifications)
+    # bulk_save_objects skips the flush, so the change hooks don't see these rows
+    mark_tables_changed(Notification.__tablename__)
+    db.session.commit()
+
+    return closed_nominations
 
 
 @click.command("close-nominations")
@@ -172,44 +249,108 @@ def close_nominations_command():
     )
 
 
-def send_notifications(webhook_url, send_func):
-    statement = (
+def chunk_messages(title, messages, notification_module):
+    """Split message lines into groups that fit in one message on the platform."""
+    chunks = list()
+    chunk = list()
+    for message in messages:
+        if chunk and notification_module.message_length(title, chunk + [message]) > notification_module.MESSAGE_LIMIT:
+            chunks.append(chunk)
+            chunk = list()
+        chunk.append(message)
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def build_payloads(notifications, notification_module, current_datetime):
+    """Build the webhook payloads for due notifications, merging digest notifications.
+
+    Notifications of a digest kind are held until the oldest of them has waited
+    NOTIFICATION_DIGEST_SECONDS, then sent together as one message per kind (split
+    to fit the platform's message size limit). Returns a dict of payloads keyed by
+    the tuple of notification ids each payload covers.
+    """
+    digest_datetime = current_datetime - timedelta(seconds=get_notification_digest_seconds())
+
+    payloads = dict()
+    digests = dict()
+    for notification in notifications:
+        if notification.kind in DIGEST_KINDS:
+            digests.setdefault(notification.kind, list()).append(notification)
+        else:
+            payloads[(notification.id,)] = notification_module.build_payload(
+                notification.title, [notification.message]
+            )
+
+    for kind, digest in digests.items():
+        if min(notification.send_at for notification in digest) > digest_datetime:
+            continue
+
+        if len(digest) == 1:
+            payloads[(digest[0].id,)] = notification_module.build_payload(digest[0].title, [digest[0].message])
+            continue
+
+        digest_title = notification_module.DIGEST_TITLES[kind]
+        offset = 0
+        for chunk in chunk_messages(digest_title, [n.message for n in digest], notification_module):
+            ids = tuple(notification.id for notification in digest[offset:offset + len(chunk)])
+            payloads[ids] = notification_module.build_payload(digest_title, chunk)
+            offset += len(chunk)
+
+    return payloads
+
+
+def due_notifications_statement(current_datetime):
+    return (
         db.select(Notification)
         .where(Notification.sent.is_(False))
-        .where(Notification.send_at < datetime.utcnow())
+        .where(Notification.send_at < current_datetime)
+        .order_by(Notification.send_at, Notification.id)
     )
-    notifications = db.session.execute(statement).scalars().all()
 
-    notifications_sent = list()
-    for notification in notifications:
-        success = send_func(notification, webhook_url)
-        if success:
-            notifications_sent.append(notification)
 
-    return notifications_sent
+def send_notifications(webhook_url, notification_module):
+    current_datetime = datetime.utcnow()
+    notifications = db.session.execute(due_notifications_statement(current_datetime)).scalars().all()
+
+    payloads = build_payloads(notifications, notification_module, current_datetime)
+    delivered_ids = {id for ids in deliver(payloads, webhook_url) for id in ids}
+    if delivered_ids:
+        db.session.execute(
+            db.update(Notification).where(Notification.id.in_(delivered_ids)).values(sent=True)
+        )
+        db.session.commit()
 
+    return [notification for notification in notifications if notification.id in delivered_ids]
 
-@click.command("send-notifications")
-def send_notifications_command():
-    """Send unsent notifications passed their send_at timestamp."""
-    # Determine which platform to use
+
+def get_notification_sender():
+    """Get the notification platform, webhook URL and platform module from config."""
     notification_type = get_config("NOTIFICATION_TYPE", "discord").lower()
 
     if notification_type == "discord":
         webhook_url = get_config("DISCORD_WEBHOOK_URL", os.environ.get("DISCORD_WEBHOOK_URL", ""))
-        send_func = send_discord_notification
+        notification_module = discord
     elif notification_type == "slack":
         webhook_url = get_config("SLACK_WEBHOOK_URL", os.environ.get("SLACK_WEBHOOK_URL", ""))
-        send_func = send_slack_notification
+        notification_module = slack
     else:
         raise RuntimeError(f"Invalid NOTIFICATION_TYPE: {notification_type}. Must be 'slack' or 'discord'")
 
     if not webhook_url:
         raise RuntimeError(f"{notification_type.upper()} webhook URL is not set in config or environment!")
 
-    notifications = send_notifications(webhook_url, send_func)
+    return notification_type, webhook_url, notification_module
+
+
+@click.command("send-notifications")
+def send_notifications_command():
+    """Send unsent notifications passed their send_at timestamp."""
+    notification_type, webhook_url, notification_module = get_notification_sender()
+
+    notifications = send_notifications(webhook_url, notification_module)
     click.echo(
         f"{datetime.utcnow().isoformat()}: Sent {len(notifications)} notifications via {notification_type}."
     )
-
-
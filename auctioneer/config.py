@@ -1,11 +1,13 @@
 """Configuration management blueprint."""
 
 import json
-from flask import Blueprint, flash, g, redirect, render_template, request, url_for
+import time
+from types import MappingProxyType
+from flask import Blueprint, flash, g, has_request_context, redirect, render_template, request, url_for
 from . import db
 from .audit_log import log_config_change
 from .auth import admin_required, login_required
-from .model import Config
+from .model import Config, ConfigVersion
 
 
 bp = Blueprint("config", __name__, url_prefix="/config")
@@ -57,6 +59,7 @@ def edit(key):
             # Log audit event
             log_config_change(key, old_value, value, user=g.user)
 
+            bump_config_version()
             db.session.commit()
             flash(f"Configuration '{key}' updated successfully.", "success")
             return redirect(url_for("admin.config.index"))
@@ -64,10 +67,117 @@ def edit(key):
     return render_template("config/edit.html", config=config)
 
 
+# Configuration snapshot caching
+
+CONFIG_VERSION_ID = 1
+
+# Parsed snapshot shared by every request in this process
+_snapshot = None
+
+
+class ConfigSnapshot:
+    """All configuration values as of one config version.
+
+    Values are parsed on first access and kept, so JSON values are only decoded
+    once per version. Returned values are shared and must be treated as read-only.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self._rows = rows  # key -> (value, value_type)
+        self._parsed = dict()
+
+    def get(self, key, default=None):
+        if key in self._parsed:
+            return self._parsed[key]
+
+        row = self._rows.get(key)
+        if row is None:
+            if default is not None:
+                return default
+            raise ValueError(f"Configuration key '{key}' not found")
+
+        value, value_type = row
+
+        # Return default if value is empty
+        if not value or value.strip() == "":
+            if default is not None:
+                return default
+            raise ValueError(f"Configuration '{key}' is not set. Please ask the league manager to configure it.")
+
+        # Parse value based on type
+        if value_type == "int":
+            parsed = int(value)
+        elif value_type == "float":
+            parsed = float(value)
+        elif value_type == "json":
+            parsed = json.loads(value)
+        else:
+            parsed = value
+
+        self._parsed[key] = parsed
+        return parsed
+
+    def memoize(self, name, func):
+        """Cache a value derived from this snapshot, e.g. an int-keyed dict."""
+        if name not in self._parsed:
+            self._parsed[name] = func()
+        return self._parsed[name]
+
+
+def get_config_snapshot():
+    """Get the current config snapshot, reloading it if another worker wrote config.
+
+    The version row is checked at most once per request; outside of a request
+    (CLI commands, the scheduler) it is checked on every call.
+    """
+    global _snapshot
+
+    if has_request_context() and "config_snapshot" in g:
+        return g.config_snapshot
+
+    version = db.session.execute(
+        db.select(ConfigVersion.version).where(ConfigVersion.id == CONFIG_VERSION_ID)
+    ).scalar() or 0
+
+    if _snapshot is None or _snapshot.version != version:
+        rows = db.session.execute(db.select(Config.key, Config.value, Config.value_type))
+        _snapshot = ConfigSnapshot(version, {row.key: (row.value, row.value_type) for row in rows})
+
+    if has_request_context():
+        g.config_snapshot = _snapshot
+
+    return _snapshot
+
+
+def bump_config_version(seed=None):
+    """Mark the config as changed so every worker reloads its snapshot.
+
+    Runs inside the caller's transaction. Pass a seed to (re)create the version
+    row, e.g. after the tables are recreated.
+    """
+    global _snapshot
+
+    if seed is None:
+        updated = db.session.execute(
+            db.update(ConfigVersion)
+            .where(ConfigVersion.id == CONFIG_VERSION_ID)
+            .values(version=ConfigVersion.version + 1)
+        ).rowcount
+        if not updated:
+            seed = int(time.time())
+    if seed is not None:
+        db.session.merge(ConfigVersion(id=CONFIG_VERSION_ID, version=seed))
+
+    _snapshot = None
+    if has_request_context():
+        g.pop("config_snapshot", None)
+
+
 # Configuration utility functions
 
 def get_config(key, default=None):
-    """Get a configuration value from the database.
+    """Get a configuration value from the cached config snapshot.
 
     Args:
         key: The configuration key to retrieve
@@ -76,48 +186,37 @@ def get_config(key, default=None):
     Returns:
         The configuration value, parsed according to its value_type
     """
-    config = Config.query.filter_by(key=key).first()
-
-    if not config:
-        if default is not None:
-            return default
-        raise ValueError(f"Configuration key '{key}' not found")
-
-    # Return default if value is empty
-    if not config.value or config.value.strip() == "":
-        if default is not None:
-            return default
-        raise ValueError(f"Configuration '{key}' is not set. Please ask the league manager to configure it.")
-
-    # Parse value based on type
-    if config.value_type == "int":
-        return int(config.value)
-    elif config.value_type == "float":
-        return float(config.value)
-    elif config.value_type == "json":
-        return json.loads(config.value)
-    else:
-        return config.value
+    return get_config_snapshot().get(key, default)
 
 
 def get_salary_cap():
     """Get the salary cap dictionary (calendar year -> cap value).
 
-    Returns dict with integer keys (e.g., 2026, 2027, etc.).
+    Returns a read-only mapping with integer keys (e.g., 2026, 2027, etc.),
+    shared by every caller until the config changes.
     """
-    data = get_config("SALARY_CAP", {})
-    # Convert string keys from JSON to integers
-    return {int(year): cap for year, cap in data.items()}
+    snapshot = get_config_snapshot()
+    # Convert string keys from JSON to integers once per config version
+    return snapshot.memoize(
+        "SALARY_CAP:int",
+        lambda: MappingProxyType({int(year): cap for year, cap in snapshot.get("SALARY_CAP", {}).items()}),
+    )
 
 
 def get_minimum_total_salary():
     """Get the minimum total salary dictionary (contract year -> min value).
 
-    Returns dict with integer keys (1-10 representing contract years).
+    Returns a read-only mapping with integer keys (1-10 representing contract
+    years), shared by every caller until the config changes.
     """
-    data = get_config("MINIMUM_TOTAL_SALARY", {})
-    # Convert string keys from JSON to integers
-    return {int(year): salary for year, salary in data.items()}
+    snapshot = get_config_snapshot()
+    # Convert string keys from JSON to integers once per config version
+    return snapshot.memoize(
+        "MINIMUM_TOTAL_SALARY:int",
+        lambda: MappingProxyType(
+            {int(year): salary for year, salary in snapshot.get("MINIMUM_TOTAL_SALARY", {}).items()}
+        ),
+    )
 
 
 def get_minimum_bid_value():
@@ -150,6 +249,11 @@ def get_notification_alert_minutes():
     return get_config("NOTIFICATION_ALERT_MINUTES", 2)
 
 
+def get_notification_digest_seconds():
+    """Get the number of seconds nomination and auction won notifications are held to merge them."""
+    return get_config("NOTIFICATION_DIGEST_SECONDS", 60)
+
+
 def get_webhook_url():
     """Get the Slack webhook URL for notifications."""
     return get_config("WEBHOOK_URL", "")
@@ -0,0 +1,113 @@
+"""Contract options derived from the MINIMUM_TOTAL_SALARY config.
+
+A winning bid can be signed to any contract length whose minimum total salary
+it meets, at an annual salary of the bid spread over the contract's years.
+The minimum totals (and their hometown discount variant) are turned into
+lookup tables once per config version, so finding the options for a bid is a
+bisect over the sorted thresholds instead of a walk over the raw config.
+"""
+
+import math
+from bisect import bisect_right
+
+from .config import get_config_snapshot, get_minimum_total_salary, get_salary_cap
+
+# Fraction of the winning bid, and of the minimum total salaries, paid by
+# players with a hometown discount
+HOMETOWN_DISCOUNT = 0.9
+
+
+class ContractOptionsTable:
+    """Contract options for every bid value, for one set of minimum total salaries.
+
+    Args:
+        minimum_total_salary: Dict of contract end year -> minimum total salary,
+            in contract length order
+    """
+
+    def __init__(self, minimum_total_salary):
+        self.min_contracts = dict()
+        self._thresholds = list()
+        self._eligible_years = [()]
+
+        if not minimum_total_salary:
+            return
+
+        last_year = list(minimum_total_salary)[0] - 1
+        self._years = {year: year - last_year for year in minimum_total_salary}
+        for year, min_salary in minimum_total_salary.items():
+            self.min_contracts[year] = {
+                "total": min_salary,
+                "annual": math.ceil(min_salary / (year - last_year)),
+            }
+
+        # _eligible_years[i] holds the years unlocked by the i lowest thresholds,
+        # kept in contract length order
+        by_threshold = sorted(minimum_total_salary.items(), key=lambda item: item[1])
+        unlocked = set()
+        for year, min_salary in by_threshold:
+            unlocked.add(year)
+            self._thresholds.append(min_salary)
+            self._eligible_years.append(tuple(year for year in minimum_total_salary if year in unlocked))
+
+    def options(self, bid_value):
+        """Get {contract end year: annual salary} for every contract the bid qualifies for."""
+        if bid_value is None:
+            return {}
+
+        years = self._eligible_years[bisect_right(self._thresholds, bid_value)]
+
+        return {year: math.ceil(bid_value / self._years[year]) for year in years}
+
+
+def get_contract_options_by_year(minimum_total_salary):
+    """Convert MINIMUM_TOTAL_SALARY indices (1-10) to calendar years.
+
+    Returns a dict mapping calendar years to minimum salary requirements.
+    For example: {2026: 12, 2027: 30, 2028: 60, ...}
+    """
+    if not minimum_total_salary:
+        return {}
+
+    salary_cap = get_salary_cap()
+    if not salary_cap:
+        return {}
+
+    base_year = min(salary_cap.keys())
+
+    # Convert indices to calendar years
+    result = {}
+    for contract_length, min_salary in minimum_total_salary.items():
+        end_year = base_year + contract_length - 1
+        result[end_year] = min_salary
+
+    return result
+
+
+def _build_tables():
+    minimum_total_salary = get_contract_options_by_year(get_minimum_total_salary())
+    discounted = {year: round(salary * HOMETOWN_DISCOUNT) for year, salary in minimum_total_salary.items()}
+
+    return {
+        False: ContractOptionsTable(minimum_total_salary),
+        True: ContractOptionsTable(discounted),
+    }
+
+
+def get_contract_options_table(hometown_discount=False):
+    """Get the contract options table for the current config.
+
+    Args:
+        hometown_discount: Get the table with discounted minimum total salaries
+
+    Returns:
+        ContractOptionsTable, shared and rebuilt only when the config changes
+    """
+    snapshot = get_config_snapshot()
+
+    return snapshot.memoize("contract_options_tables", _build_tables)[bool(hometown_discount)]
+
+
+def get_hometown_discount_bid(bid_value, minimum_bid_value):
+    """Get what a hometown discount player's matched bid costs, never below the minimum bid."""
+    return max(math.ceil(bid_value * HOMETOWN_DISCOUNT), minimum_bid_value)
@@ -0,0 +1,132 @@
+"""Webhook delivery pipeline shared by the Discord and Slack notifications.
+
+Payloads are posted from a small thread pool over one pooled keep-alive
+session. When the webhook answers 429 every worker pauses for the requested
+retry_after before trying again.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+# Concurrent requests per delivery run (also the connection pool size)
+MAX_WORKERS = 4
+
+# Attempts per payload, counting retries after rate limiting
+MAX_ATTEMPTS = 5
+
+# (connect, read) timeout in seconds
+TIMEOUT = (5, 10)
+
+# Backoff in seconds when a 429 response doesn't say how long to wait
+DEFAULT_RETRY_AFTER = 1.0
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Get the process-wide session so connections are kept alive between runs."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+
+    return _session
+
+
+class RateLimiter:
+    """Pause shared by all workers so one 429 backs off the whole run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def get_retry_after(response):
+    """Get the backoff requested by a 429 response, in seconds.
+
+    Discord sends retry_after in the JSON body; Slack sends a Retry-After header.
+    """
+    try:
+        return float(response.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def post_payload(session, webhook_url, payload, rate_limiter):
+    """Post one payload, backing off on rate limits.
+
+    Returns an error message, or None on success.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        rate_limiter.wait()
+        response = session.post(webhook_url, json=payload, timeout=TIMEOUT)
+        if response.status_code == 429:
+            rate_limiter.pause(get_retry_after(response))
+            continue
+        if response.status_code in [200, 204]:
+            return None
+        return f"status {response.status_code}: {response.text}"
+
+    return f"still rate limited after {MAX_ATTEMPTS} attempts"
+
+
+def deliver(payloads, webhook_url, max_workers=MAX_WORKERS):
+    """Send payloads to a webhook with bounded concurrency.
+
+    Args:
+        payloads: Dict of key (e.g. notification id) -> JSON payload
+        webhook_url: The webhook to post to
+        max_workers: Maximum number of requests in flight
+
+    Returns:
+        The keys of the payloads that were delivered
+    """
+    if not payloads:
+        return []
+
+    session = get_session()
+    rate_limiter = RateLimiter()
+
+    def send(item):
+        key, payload = item
+        try:
+            return key, post_payload(session, webhook_url, payload, rate_limiter)
+        except requests.RequestException as e:
+            return key, str(e)
+
+    delivered = list()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(payloads))) as executor:
+        for key, error in executor.map(send, payloads.items()):
+            if error is None:
+                delivered.append(key)
+            else:
+                current_app.logger.error(f"Failed to send notification {key}: {error}")
+
+    return delivered
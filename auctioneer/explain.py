@@ -0,0 +1,120 @@
+"""Index advisor for the hot query paths.
+
+Runs EXPLAIN QUERY PLAN on the hottest queries in utils, commands,
+notifications, auction, search, players, rosters and audit_log and flags full
+table scans, so a missing or unusable index shows up before auction night. The
+statements come from the same builders the queries run, with sample arguments,
+so the plans can't drift from the code.
+"""
+
+from datetime import datetime
+
+import click
+
+from . import db
+from .audit_log import audit_log_statements
+from .auction import available_players_statement
+from .commands import due_nominations_statement, due_notifications_statement
+from .model import Player
+from .notifications import remove_notification_statement
+from .players import page_statement
+from .read_models import bid_values_statement, nominations_statement, pool_players_statement, roster_statement
+from .search import candidates_statement
+from .utils import (
+    bids_statement,
+    nominations_per_round_statement,
+    open_slots_statement,
+    top_bids_statement,
+    user_bid_statement,
+)
+
+
+def _hot_queries():
+    """Get (name, statement, tables allowed to be scanned) for each hot query.
+
+    Scans are allowed on tables the query has to read in full anyway, and on the
+    small fixed-size user table.
+    """
+    audit_log_query, audit_log_count = audit_log_statements(entity_type="", user_id="", show_sensitive=False)
+    no_filters = {"status": "", "team": "", "position": "", "matcher": "", "name": ""}
+
+    return [
+        ("utils.get_user_bid_for_nomination", user_bid_statement(1, 1), set()),
+        ("utils.get_bids_by_user", bids_statement([1, 2]), set()),
+        ("utils.get_winning_bids", top_bids_statement([1, 2]), set()),
+        ("utils.get_open_slots", open_slots_statement(in_nomination_period_only=True), set()),
+        ("utils.user_can_nominate", nominations_per_round_statement(1), set()),
+        ("commands.close_nominations", due_nominations_statement(datetime.utcnow()), {"nomination"}),
+        ("commands.send_notifications", due_notifications_statement(datetime.utcnow()), set()),
+        ("notifications.remove_notification", remove_notification_statement("auction_match:1"), set()),
+        ("auction.index", nominations_statement(user_id=1), {"nomination", "slot"}),
+        ("auction.index (bids)", bid_values_statement([1, 2]), set()),
+        (
+            "auction.nominate",
+            db.select(available_players_statement().where(Player.id == 1).exists()),
+            set(),
+        ),
+        ("search.search_players", candidates_statement([1, 2, 3], available_only=True), set()),
+        (
+            "players.index",
+            pool_players_statement(page_statement(no_filters, after=("M", 1))),
+            {"user"},
+        ),
+        ("rosters.roster", roster_statement("ABC"), {"user"}),
+        ("audit_log.index", audit_log_query.limit(50), set()),
+        ("audit_log.index (count)", audit_log_count, set()),
+    ]
+
+
+def _full_scans(plan_details):
+    """Get the tables scanned without an index from EXPLAIN QUERY PLAN details.
+
+    Scans of subquery results and of the constant row of a bare SELECT EXISTS
+    don't read a table, so they are left out.
+    """
+    subqueries = {detail.split()[1] for detail in plan_details if detail.split()[0] in ("CO-ROUTINE", "MATERIALIZE")}
+    tables = set()
+    for detail in plan_details:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and "INDEX" not in words and words[1:3] != ["CONSTANT", "ROW"]:
+            table = words[2] if words[1] == "TABLE" else words[1]
+            if table not in subqueries:
+                tables.add(table)
+    return tables
+
+
+def explain_hot_queries():
+    """Explain every hot query.
+
+    Returns a list of (name, plan details, unexpected full scans).
+    """
+    connection = db.session.connection()
+    results = list()
+    for name, statement, allowed_scans in _hot_queries():
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        parameters = tuple(compiled.params[key] for key in compiled.positiontup)
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", parameters)
+        details = [row[-1] for row in plan]
+        results.append((name, details, sorted(_full_scans(details) - allowed_scans)))
+
+    return results
+
+
+@click.command("explain-hot-queries")
+def explain_hot_queries_command():
+    """Show query plans for the hot queries and flag full table scans."""
+    if db.engine.dialect.name != "sqlite":
+        raise click.ClickException("explain-hot-queries requires the SQLite backend.")
+
+    regressions = 0
+    for name, details, full_scans in explain_hot_queries():
+        status = f"FULL SCAN of {', '.join(full_scans)}" if full_scans else "ok"
+        click.echo(f"{name}: {status}")
+        for detail in details:
+            click.echo(f"    {detail}")
+        if full_scans:
+            regressions += 1
+
+    if regressions:
+        raise click.ClickException(f"{regressions} hot queries do full table scans.")
+    click.echo("No unexpected full table scans.")
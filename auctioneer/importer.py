@@ -0,0 +1,251 @@
+"""Streaming player imports from Fantrax exports.
+
+FantraxExportParser reads an export straight from a (optionally gzipped) byte
+stream and yields validated rows in batches, collecting every row error along
+the way instead of stopping at the first one. upsert_players compares each
+batch with the stored players by fantrax_id and writes only new and changed
+players with a bulk INSERT ... ON CONFLICT DO UPDATE. Player ids are kept, so
+nominations and bids survive a re-import.
+"""
+
+import csv
+import gzip
+import io
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from . import db
+from .database import get_insert
+from .model import Nomination, Player
+
+# Columns Fantrax owns and that are always refreshed from the export
+PLAYER_COLUMNS = ["name", "team", "position"]
+
+# Columns that are also refreshed when rosters are updated from the export
+ROSTER_COLUMNS = ["salary", "contract", "manager_id", "matcher_id", "hometown_discount"]
+
+# Columns every export must have
+REQUIRED_HEADERS = ["ID", "Player", "Team", "Position", "Status", "Salary", "Contract"]
+
+# Rows yielded per batch by the parser
+BATCH_SIZE = 1000
+
+# Ids per DELETE statement, to stay under the database's bound parameter limit
+DELETE_BATCH_SIZE = 500
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+PlayerRow = namedtuple(
+    "PlayerRow",
+    ["fantrax_id", "name", "team", "position", "salary", "contract", "manager_id", "matcher_id", "hometown_discount"],
+)
+
+RowError = namedtuple("RowError", ["line", "fantrax_id", "message"])
+
+ImportResult = namedtuple(
+    "ImportResult", ["inserted", "updated", "unchanged", "deleted", "kept", "seconds"]
+)
+
+
+class FantraxExportParser:
+    """Parse a Fantrax player export from a byte stream in a single pass.
+
+    Iterating yields lists of up to batch_size PlayerRows. Rows that fail
+    validation are left out and recorded in errors, so a whole file can be
+    checked at once. Only one batch is held in memory at a time, apart from the
+    set of ids seen so far, which is needed to catch duplicates.
+    """
+
+    def __init__(self, stream, users, batch_size=BATCH_SIZE):
+        self.stream = stream
+        self.short_name_to_user = {user.short_team_name: user.id for user in users}
+        self.batch_size = batch_size
+        self.errors = list()
+        self.row_count = 0
+        self.seen_ids = set()
+
+    def _open_text(self):
+        stream = self.stream
+        if not hasattr(stream, "peek"):
+            stream = io.BufferedReader(stream if isinstance(stream, io.RawIOBase) else _RawStream(stream))
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            stream = gzip.GzipFile(fileobj=stream)
+        # utf-8-sig drops the byte order mark spreadsheet exports often start with
+        return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    def __iter__(self):
+        reader = csv.reader(self._open_text())
+        header = next(reader, None)
+        if header is None:
+            self.errors.append(RowError(1, None, "File is empty."))
+            return
+
+        columns = {name.strip(): i for i, name in enumerate(header)}
+        missing = [name for name in REQUIRED_HEADERS if name not in columns]
+        if missing:
+            self.errors.append(RowError(1, None, f"Missing required columns: {', '.join(missing)}."))
+            return
+
+        batch = list()
+        for values in reader:
+            if not any(values):
+                continue
+            self.row_count += 1
+            row = self._parse_row(reader.line_num, columns, values)
+            if row is None:
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = list()
+        if batch:
+            yield batch
+
+    def _parse_row(self, line, columns, values):
+        def get(name):
+            i = columns.get(name)
+            return values[i].strip() if i is not None and i < len(values) else ""
+
+        fantrax_id = get("ID")
+        errors = list()
+        if not fantrax_id:
+            errors.append("ID is required.")
+        elif fantrax_id in self.seen_ids:
+            errors.append("ID appears more than once in the file.")
+        name = get("Player")
+        if not name:
+            errors.append("Player name is required.")
+
+        status = get("Status")
+        salary = contract = None
+        if status != "FA":
+            try:
+                salary = int(float(get("Salary")))
+            except ValueError:
+                errors.append(f"Salary '{get('Salary')}' is not a number.")
+            try:
+                contract = int(get("Contract"))
+            except ValueError:
+                errors.append(f"Contract '{get('Contract')}' is not a year.")
+
+        # Optional: Match rights (team short name)
+        matcher_id = None
+        match_rights = get("Match Rights")
+        if match_rights:
+            matcher_id = self.short_name_to_user.get(match_rights)
+            if matcher_id is None:
+                errors.append(f"Match Rights '{match_rights}' is not a team.")
+
+        # Optional: Hometown discount (Yes/No, True/False, 1/0)
+        hometown_discount = get("Hometown Discount").lower() in ["yes", "true", "1", "y"]
+
+        if fantrax_id:
+            self.seen_ids.add(fantrax_id)
+        if errors:
+            self.errors.extend(RowError(line, fantrax_id or None, message) for message in errors)
+            return None
+
+        return PlayerRow(
+            fantrax_id=fantrax_id,
+            name=name,
+            team=get("Team"),
+            position=get("Position"),
+            salary=salary,
+            contract=contract,
+            manager_id=self.short_name_to_user.get(status),
+            matcher_id=matcher_id,
+            hometown_discount=hometown_discount,
+        )
+
+
+class _RawStream(io.RawIOBase):
+    """Adapter so any object with read() can be wrapped in a BufferedReader and peeked."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def insert_players(batches):
+    """Insert every player in batches of PlayerRows with executemany.
+
+    Returns the number of players inserted. The caller commits.
+    """
+    count = 0
+    for batch in batches:
+        db.session.execute(db.insert(Player), [row._asdict() for row in batch])
+        count += len(batch)
+
+    return count
+
+
+def upsert_players(batches, update_rosters=False, delete_missing=False):
+    """Insert new players and update changed ones, keyed by fantrax_id.
+
+    Args:
+        batches: Iterable of lists of PlayerRows, e.g. a FantraxExportParser
+        update_rosters: Also overwrite salary, contract, manager, match rights and
+            hometown discount of existing players
+        delete_missing: Delete players that aren't in the rows, except ones that
+            have been nominated
+
+    Returns:
+        ImportResult with the number of inserted, updated, unchanged and deleted
+        players, the number of missing players kept because they were nominated,
+        and the time taken in seconds. The caller commits.
+    """
+    started_at = time.perf_counter()
+
+    columns = PLAYER_COLUMNS + ROSTER_COLUMNS if update_rosters else PLAYER_COLUMNS
+    existing = {
+        row.fantrax_id: row
+        for row in db.session.execute(
+            db.select(Player.id, Player.fantrax_id, *(getattr(Player, column) for column in columns))
+        )
+    }
+
+    table = Player.__table__
+    statement = get_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.fantrax_id],
+        # ON CONFLICT updates don't apply the column's onupdate
+        set_={**{column: statement.excluded[column] for column in columns}, "updated_at": datetime.utcnow()},
+    )
+
+    seen = set()
+    inserted = updated = unchanged = 0
+    for batch in batches:
+        upserts = list()
+        for row in batch:
+            seen.add(row.fantrax_id)
+            current = existing.get(row.fantrax_id)
+            if current is None:
+                inserted += 1
+            elif any(getattr(current, column) != getattr(row, column) for column in columns):
+                updated += 1
+            else:
+                unchanged += 1
+                continue
+            upserts.append(row._asdict())
+        if upserts:
+            db.session.execute(statement, upserts)
+
+    deleted = kept = 0
+    if delete_missing:
+        missing_ids = [row.id for fantrax_id, row in existing.items() if fantrax_id not in seen]
+        nominated_ids = set(db.session.execute(db.select(Nomination.player_id)).scalars())
+        deletable_ids = [id for id in missing_ids if id not in nominated_ids]
+        kept = len(missing_ids) - len(deletable_ids)
+        for start in range(0, len(deletable_ids), DELETE_BATCH_SIZE):
+            batch = deletable_ids[start:start + DELETE_BATCH_SIZE]
+            deleted += db.session.execute(db.delete(Player).where(Player.id.in_(batch))).rowcount
+
+    return ImportResult(inserted, updated, unchanged, deleted, kept, time.perf_counter() - started_at)
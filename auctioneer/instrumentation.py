@@ -0,0 +1,124 @@
+"""Per-request SQL query counting and timing instrumentation.
+
+Enabled with the SQL_INSTRUMENTATION app setting. When enabled, every response
+gets a Server-Timing header and a rolling per-endpoint summary is kept in
+memory for the admin instrumentation page.
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+
+from flask import Blueprint, current_app, g, has_request_context, render_template, request
+from sqlalchemy import event
+
+from . import db
+from .auth import admin_required, login_required
+
+bp = Blueprint("instrumentation", __name__, url_prefix="/instrumentation")
+
+# Number of most recent requests kept per endpoint
+WINDOW_SIZE = 200
+
+_samples = dict()
+_samples_lock = threading.Lock()
+
+
+@bp.route("/")
+@login_required
+@admin_required
+def index():
+    """Show the rolling per-endpoint query summary for this process."""
+    return render_template(
+        "instrumentation/index.html",
+        enabled=current_app.config.get("SQL_INSTRUMENTATION", False),
+        summaries=get_endpoint_summaries(),
+        window_size=WINDOW_SIZE,
+    )
+
+
+def init_app(app):
+    """Hook the engine and request events if instrumentation is enabled."""
+    if not app.config.get("SQL_INSTRUMENTATION", False):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    if has_request_context() and "query_count" in g:
+        g.query_count += 1
+        g.query_time += elapsed
+
+
+def _start_request_timer():
+    g.request_start_time = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+
+
+def _record_request(response):
+    if "request_start_time" not in g:
+        return response
+
+    wall_ms = (time.perf_counter() - g.request_start_time) * 1000
+    db_ms = g.query_time * 1000
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.1f};desc="{g.query_count} queries", app;dur={wall_ms:.1f}'
+    )
+    response.headers["X-Query-Count"] = str(g.query_count)
+
+    endpoint = request.endpoint or "<unmatched>"
+    with _samples_lock:
+        if endpoint not in _samples:
+            _samples[endpoint] = deque(maxlen=WINDOW_SIZE)
+        _samples[endpoint].append((g.query_count, db_ms, wall_ms))
+
+    return response
+
+
+def get_endpoint_summaries():
+    """Summarize the recorded requests for each endpoint.
+
+    Returns a list of dicts sorted by the highest average query count first.
+    """
+    with _samples_lock:
+        samples = {endpoint: list(values) for endpoint, values in _samples.items()}
+
+    summaries = list()
+    for endpoint, values in samples.items():
+        query_counts = [v[0] for v in values]
+        db_times = [v[1] for v in values]
+        wall_times = [v[2] for v in values]
+        summaries.append(
+            {
+                "endpoint": endpoint,
+                "requests": len(values),
+                "avg_queries": statistics.mean(query_counts),
+                "max_queries": max(query_counts),
+                "avg_db_ms": statistics.mean(db_times),
+                "avg_wall_ms": statistics.mean(wall_times),
+                "p95_wall_ms": _percentile(wall_times, 95),
+            }
+        )
+
+    return sorted(summaries, key=lambda s: s["avg_queries"], reverse=True)
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
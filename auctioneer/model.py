@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from . import db
 
 
@@ -26,6 +28,7 @@ class User(db.Model):
 
 class Player(db.Model):
     __tablename__ = "player"
+    __table_args__ = (db.Index("ix_player_name_id", "name", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     fantrax_id = db.Column(db.String, index=True, nullable=False, unique=True)
@@ -34,9 +37,12 @@ class Player(db.Model):
     position = db.Column(db.String, nullable=False)
     salary = db.Column(db.Integer, default=None)
     contract = db.Column(db.Integer, default=None)
-    manager_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    matcher_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+    manager_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    matcher_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
     hometown_discount = db.Column(db.Boolean, default=False, nullable=False)
+    # Set by the app rather than the database, whose CURRENT_TIMESTAMP is only
+    # precise to the second on SQLite
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # One-to-one relationships
     nomination = db.relationship("Nomination", back_populates="player")
@@ -46,10 +52,17 @@ class Player(db.Model):
 
 class Slot(db.Model):
     __tablename__ = "slot"
+    __table_args__ = (
+        db.Index(
+            "ix_slot_nomination_opens_at_nomination_closes_at",
+            "nomination_opens_at",
+            "nomination_closes_at",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     round = db.Column(db.Integer)
-    closes_at = db.Column(db.DateTime, nullable=False)
+    closes_at = db.Column(db.DateTime, nullable=False, index=True)
     nomination_opens_at = db.Column(db.DateTime, nullable=False)
     nomination_closes_at = db.Column(db.DateTime, nullable=False)
 
@@ -67,7 +80,7 @@ class Nomination(db.Model):
     slot_id = db.Column(
         db.Integer, db.ForeignKey("slot.id"), unique=True, nullable=False
     )
-    nominator_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    nominator_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
 
     # One-to-one relationships
@@ -92,6 +105,10 @@ class Nomination(db.Model):
 
 class Bid(db.Model):
     __tablename__ = "bid"
+    __table_args__ = (
+        db.Index("ix_bid_user_id_nomination_id", "user_id", "nomination_id", unique=True),
+        db.Index("ix_bid_nomination_id_value", "nomination_id", "value"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -111,12 +128,19 @@ class Bid(db.Model):
 
 class Notification(db.Model):
     __tablename__ = "notification"
+    __table_args__ = (db.Index("ix_notification_sent_send_at", "sent", "send_at"),)
 
     id = db.Column(db.Integer, primary_key=True)
     sent = db.Column(db.Boolean, nullable=False, default=False)
     title = db.Column(db.String)
     message = db.Column(db.String)
     send_at = db.Column(db.DateTime, nullable=False)
+    kind = db.Column(db.String, index=True)  # 'player_nominated', 'auction_won', etc.
+    round = db.Column(db.Integer, index=True)
+    nomination_id = db.Column(
+        db.Integer, db.ForeignKey("nomination.id", ondelete="SET NULL"), index=True
+    )
+    dedupe_key = db.Column(db.String, unique=True, index=True)  # e.g. 'auction_match:42'
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
 
 
@@ -130,8 +154,17 @@ class Config(db.Model):
     value_type = db.Column(db.String, nullable=False)  # 'int', 'float', 'json'
 
 
+class ConfigVersion(db.Model):
+    __tablename__ = "config_version"
+
+    # Single row, bumped on every config write so workers know to reload
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
 class AuditLog(db.Model):
     __tablename__ = "audit_log"
+    __table_args__ = (db.Index("ix_audit_log_is_sensitive_created_at", "is_sensitive", "created_at"),)
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
@@ -1,6 +1,22 @@
 """Notification routing layer - automatically uses Discord or Slack based on config."""
 
+from . import db
 from .config import get_config
+from .model import Notification
+
+# Notification kinds, stored in Notification.kind
+NOMINATION_PERIOD_BEGUN = "nomination_period_begun"
+NOMINATION_PERIOD_END = "nomination_period_end"
+AUCTIONS_CLOSE = "auctions_close"
+PLAYER_NOMINATED = "player_nominated"
+AUCTION_WON = "auction_won"
+AUCTION_MATCH = "auction_match"
+
+# Kinds merged into one message per send window
+DIGEST_KINDS = {PLAYER_NOMINATED, AUCTION_WON}
+
+# Kinds whose dedupe key is a nomination id
+NOMINATION_KINDS = {PLAYER_NOMINATED, AUCTION_WON, AUCTION_MATCH}
 
 
 def get_notification_module():
@@ -17,6 +33,63 @@ def get_notification_module():
     return notification_module
 
 
+def get_dedupe_key(kind, key):
+    """Get the dedupe key for a notification kind and its round number or nomination id."""
+    return f"{kind}:{key}"
+
+
+def save_notification(notification):
+    """Add a notification unless one with the same dedupe key already exists.
+
+    An unsent notification with the same key is updated in place. One that was
+    already sent is left alone, so a message is never delivered twice. The
+    caller commits.
+
+    Returns the saved (or already sent) notification.
+    """
+    existing = db.session.execute(
+        db.select(Notification).where(Notification.dedupe_key == notification.dedupe_key)
+    ).scalar_one_or_none()
+    if existing is None:
+        db.session.add(notification)
+        return notification
+    if existing.sent:
+        return existing
+
+    existing.title = notification.title
+    existing.message = notification.message
+    existing.send_at = notification.send_at
+    existing.kind = notification.kind
+    existing.round = notification.round
+    existing.nomination_id = notification.nomination_id
+
+    return existing
+
+
+def remove_nomination_notifications(nomination):
+    """Delete every notification keyed to a nomination, sent or not.
+
+    SQLite can give a deleted nomination's id to the next nomination, which would
+    then share these dedupe keys and never be announced. The caller commits.
+    """
+    dedupe_keys = [get_dedupe_key(kind, nomination.id) for kind in NOMINATION_KINDS]
+    db.session.execute(db.delete(Notification).where(Notification.dedupe_key.in_(dedupe_keys)))
+
+
+def remove_notification_statement(dedupe_key, unsent_only=False):
+    statement = db.delete(Notification).where(Notification.dedupe_key == dedupe_key)
+    if unsent_only:
+        statement = statement.where(Notification.sent.is_(False))
+
+    return statement
+
+
+def remove_notification(dedupe_key, unsent_only=False):
+    """Delete the notification with a dedupe key, if there is one, and commit."""
+    db.session.execute(remove_notification_statement(dedupe_key, unsent_only))
+    db.session.commit()
+
+
 # Export all notification functions dynamically
 def add_nomination_period_begun_notification(*args, **kwargs):
     return get_notification_module().add_nomination_period_begun_notification(*args, **kwargs)
@@ -38,21 +111,25 @@ def add_auction_won_notification(*args, **kwargs):
     return get_notification_module().add_auction_won_notification(*args, **kwargs)
 
 
+def build_auction_won_notification(*args, **kwargs):
+    return get_notification_module().build_auction_won_notification(*args, **kwargs)
+
+
 def add_auction_match_notification(*args, **kwargs):
     return get_notification_module().add_auction_match_notification(*args, **kwargs)
 
 
-def remove_nomination_period_begun_notification(*args, **kwargs):
-    return get_notification_module().remove_nomination_period_begun_notification(*args, **kwargs)
+def remove_nomination_period_begun_notification(round_number):
+    remove_notification(get_dedupe_key(NOMINATION_PERIOD_BEGUN, int(round_number)))
 
 
-def remove_nomination_period_end_notification(*args, **kwargs):
-    return get_notification_module().remove_nomination_period_end_notification(*args, **kwargs)
+def remove_nomination_period_end_notification(round_number):
+    remove_notification(get_dedupe_key(NOMINATION_PERIOD_END, int(round_number)))
 
 
-def remove_auctions_close_notification(*args, **kwargs):
-    return get_notification_module().remove_auctions_close_notification(*args, **kwargs)
+def remove_auctions_close_notification(round_number):
+    remove_notification(get_dedupe_key(AUCTIONS_CLOSE, int(round_number)))
 
 
-def remove_auction_match_notification(*args, **kwargs):
-    return get_notification_module().remove_auction_match_notification(*args, **kwargs)
+def remove_auction_match_notification(nomination):
+    remove_notification(get_dedupe_key(AUCTION_MATCH, nomination.id), unsent_only=True)
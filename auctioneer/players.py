@@ -1,28 +1,136 @@
-import os
-import tempfile
 from flask import Blueprint, flash, g, redirect, render_template, request, url_for
 from werkzeug.utils import secure_filename
 
 from . import db
-from .audit_log import log_admin_player_edit, log_csv_import
+from .audit_log import log_admin_player_edit, log_csv_import, log_csv_update
 from .auth import admin_required, login_required
-from .constants import TEAMS
+from .constants import POSITIONS, TEAMS
+from .importer import FantraxExportParser, insert_players, upsert_players
 from .model import Bid, Nomination, Player, User
-from .utils import players_from_fantrax_export
+from .read_models import get_pool_players, get_teams
 
 bp = Blueprint("players", __name__, url_prefix="/players")
 
 
+# Players shown per page of the player pool
+PER_PAGE = 100
+
+# Position filter values that also match the specific pitcher positions
+PITCHER_POSITIONS = {"P": ["P", "SP", "RP"]}
+
+
+def filter_players(statement, status, team, position, matcher, name):
+    """Apply the player pool filters to a statement.
+
+    Args:
+        statement: Statement selecting players
+        status: "fa" for free agents, a user id for their roster, or "" for all
+        team: MLB team, or "" for all
+        position: Position the player is eligible at, or "" for all
+        matcher: "none" for no match rights, a user id for theirs, or "" for all
+        name: Text the player's name contains, or "" for all
+    """
+    if status == "fa":
+        statement = statement.where(Player.manager_id.is_(None))
+    elif status:
+        statement = statement.where(Player.manager_id == int(status))
+    if team:
+        statement = statement.where(Player.team == team)
+    if position:
+        # Positions are stored comma separated, e.g. "2B,SS"
+        conditions = list()
+        for value in PITCHER_POSITIONS.get(position, [position]):
+            conditions += [
+                Player.position == value,
+                Player.position.like(f"{value},%"),
+                Player.position.like(f"%,{value}"),
+                Player.position.like(f"%,{value},%"),
+            ]
+        statement = statement.where(db.or_(*conditions))
+    if matcher == "none":
+        statement = statement.where(Player.matcher_id.is_(None))
+    elif matcher:
+        statement = statement.where(Player.matcher_id == int(matcher))
+    if name:
+        statement = statement.where(Player.name.ilike(f"%{name}%"))
+
+    return statement
+
+
+def page_statement(filters, after=None, before=None):
+    """Select the ids of one page of the player pool, plus one to tell if there are more.
+
+    Args:
+        filters: Keyword arguments for filter_players
+        after: (name, id) of the player the page follows, if any
+        before: (name, id) of the player the page precedes, if any; the page is
+            selected in reverse order
+    """
+    statement = filter_players(db.select(Player.id), **filters)
+    if after is not None:
+        statement = statement.where(db.tuple_(Player.name, Player.id) > after)
+    elif before is not None:
+        statement = statement.where(db.tuple_(Player.name, Player.id) < before)
+
+    # Fetch one extra row to know if there is another page in that direction
+    if before is not None:
+        statement = statement.order_by(Player.name.desc(), Player.id.desc())
+    else:
+        statement = statement.order_by(Player.name, Player.id)
+
+    return statement.limit(PER_PAGE + 1)
+
+
 @bp.route("/")
 @login_required
 @admin_required
 def index():
-    players = (
-        db.session.execute(db.select(Player).order_by(Player.name)).scalars().all()
+    """Show one page of the player pool, filtered and in name order.
+
+    Pages are keyset paginated on (name, id): after_name/after_id load the page
+    after a player and before_name/before_id the page before one, so every page
+    costs the same however deep into the pool it is.
+    """
+    filters = {
+        "status": request.args.get("status", ""),
+        "team": request.args.get("team", ""),
+        "position": request.args.get("position", ""),
+        "matcher": request.args.get("matcher", ""),
+        "name": request.args.get("name", "").strip(),
+    }
+    for key in ("status", "matcher"):
+        if filters[key] not in ("", "fa", "none") and not filters[key].isdigit():
+            filters[key] = ""
+
+    after_id = request.args.get("after_id", type=int)
+    before_id = request.args.get("before_id", type=int)
+    after = before = None
+    if after_id is not None:
+        after = (request.args.get("after_name", ""), after_id)
+    elif before_id is not None:
+        before = (request.args.get("before_name", ""), before_id)
+    players = get_pool_players(page_statement(filters, after, before))
+
+    has_more = len(players) > PER_PAGE
+    players = players[:PER_PAGE]
+    if before is not None:
+        players.reverse()
+        has_previous, has_next = has_more, True
+    else:
+        has_previous, has_next = after is not None, has_more
+
+    users = get_teams()
+
+    return render_template(
+        "players/index.html",
+        players=players,
+        users=users,
+        teams=TEAMS,
+        positions=POSITIONS,
+        filters=filters,
+        has_previous=has_previous and bool(players),
+        has_next=has_next and bool(players),
     )
-    users = db.session.execute(db.select(User)).scalars().all()
-
-    return render_template("players/index.html", players=players, users=users)
 
 
 @bp.route("/<int:player_id>/edit/", methods=["GET", "POST"])
@@ -105,50 +213,63 @@ def import_players():
             return redirect(request.url)
 
         # Validate file type
-        if not file.filename.endswith(".csv"):
-            flash("File must be a CSV.", "error")
+        if not file.filename.endswith((".csv", ".csv.gz")):
+            flash("File must be a CSV or a gzipped CSV.", "error")
             return redirect(request.url)
 
         try:
-            # Save to temporary file
-            temp_fd, temp_path = tempfile.mkstemp(suffix=".csv")
-            os.close(temp_fd)  # Close the file descriptor
-            file.save(temp_path)
-
             # Get all users for matcher assignment
             users = db.session.execute(db.select(User)).scalars().all()
 
-            # Parse CSV and create player objects
-            new_players = players_from_fantrax_export(temp_path, users)
-
-            # Delete all existing data (in order of foreign key dependencies)
-            # First delete bids (they reference nominations)
-            db.session.query(Bid).delete()
-            # Then delete nominations (they reference players)
-            db.session.query(Nomination).delete()
-            # Finally delete players
-            db.session.query(Player).delete()
-
-            # Add new players
-            db.session.add_all(new_players)
+            # Parse straight from the upload, one batch of rows at a time
+            parser = FantraxExportParser(file.stream, users)
+
+            if request.form.get("mode") == "update":
+                # Apply only the differences, keeping player ids, nominations and bids
+                result = upsert_players(
+                    parser,
+                    update_rosters=request.form.get("update_rosters") == "on",
+                    delete_missing=request.form.get("delete_missing") == "on",
+                )
+                message = (
+                    f"Updated players in {result.seconds:.2f}s: {result.inserted} added, {result.updated} updated, "
+                    f"{result.unchanged} unchanged, {result.deleted} deleted."
+                )
+                if result.kept:
+                    message += f" Kept {result.kept} nominated players missing from the file."
+            else:
+                # Delete all existing data (in order of foreign key dependencies)
+                # First delete bids (they reference nominations)
+                db.session.query(Bid).delete()
+                # Then delete nominations (they reference players)
+                db.session.query(Nomination).delete()
+                # Finally delete players
+                db.session.query(Player).delete()
+
+                # Add new players
+                player_count = insert_players(parser)
+                message = f"Successfully imported {player_count} players."
+
+            # Nothing is imported unless every row is valid
+            if parser.errors:
+                db.session.rollback()
+                flash(f"No players were imported because {len(parser.errors)} problems were found.", "error")
+                return render_template("players/import.html", errors=parser.errors, row_count=parser.row_count)
 
             # Log audit event
-            log_csv_import(len(new_players), user=g.user)
+            if request.form.get("mode") == "update":
+                log_csv_update(result._asdict(), user=g.user)
+            else:
+                log_csv_import(player_count, user=g.user)
 
             db.session.commit()
 
-            # Clean up temp file
-            os.unlink(temp_path)
-
-            flash(f"Successfully imported {len(new_players)} players.", "success")
+            flash(message, "success")
             return redirect(url_for("admin.players.index"))
 
         except Exception as e:
             db.session.rollback()
             flash(f"Error importing players: {str(e)}", "error")
-            # Clean up temp file if it exists
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
             return redirect(request.url)
 
     return render_template("players/import.html")
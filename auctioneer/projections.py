@@ -0,0 +1,147 @@
+"""League-wide salary cap projections.
+
+The roster and cap space pages show each team's committed salary and player
+count for every salary cap year. Rather than walking one team's contracts year
+by year on every page view, each process builds the whole teams x years matrix
+in one pass over the rostered players' (manager_id, salary, contract) rows and
+keeps it until players change. Every contract covers a run of cap years
+starting with the first one, so each player is added once to a per-team
+difference array and the totals fall out of a running sum. Cap years need not
+be contiguous: a contract counts in every cap year up to its last year.
+
+The projection is rebuilt after this process commits player changes, when the
+salary cap config changes, when another process changes rosters (detected by a
+cheap fingerprint query, run at most every FINGERPRINT_CHECK_SECONDS) and at
+least every PROJECTION_MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+from . import db
+from .config import get_config_snapshot, get_salary_cap
+from .database import on_commit_of
+from .model import Player
+
+# How often page views check the database for roster changes made by other processes
+FINGERPRINT_CHECK_SECONDS = 5
+
+# Seconds a projection is kept at most, even while the roster fingerprint is unchanged
+PROJECTION_MAX_AGE_SECONDS = 300
+
+_projection = None
+_projection_lock = threading.Lock()
+
+
+def init_app(app):
+    """Rebuild the projection after this process commits player changes."""
+    on_commit_of({Player.__tablename__}, invalidate_salary_projection)
+
+
+class SalaryProjection:
+    """Committed salary and player count for every team and salary cap year.
+
+    salary[manager_id] and players[manager_id] are lists aligned with years.
+    Teams without rostered players have no entry; use for_team to get zeros.
+    """
+
+    def __init__(self, salary_cap, rows, key):
+        self.key = key
+        self.built_at = self.checked_at = time.monotonic()
+        self.salary_cap = salary_cap
+        self.years = sorted(salary_cap)
+        self.caps = [salary_cap[year] for year in self.years]
+
+        self.salary = dict()
+        self.players = dict()
+        if not self.years:
+            return
+
+        width = len(self.years)
+        salary_deltas = dict()
+        player_deltas = dict()
+        for manager_id, salary, contract in rows:
+            # A contract through `contract` counts in every cap year up to and including it
+            years_covered = bisect_right(self.years, contract)
+            if years_covered <= 0:
+                continue
+            if manager_id not in salary_deltas:
+                salary_deltas[manager_id] = [0] * (width + 1)
+                player_deltas[manager_id] = [0] * (width + 1)
+            salary_deltas[manager_id][0] += salary
+            salary_deltas[manager_id][years_covered] -= salary
+            player_deltas[manager_id][0] += 1
+            player_deltas[manager_id][years_covered] -= 1
+
+        for manager_id, deltas in salary_deltas.items():
+            self.salary[manager_id] = list(accumulate(deltas[:width]))
+            self.players[manager_id] = list(accumulate(player_deltas[manager_id][:width]))
+
+    def for_team(self, manager_id):
+        """Get {year: {"salary", "players", "cap", "cap_space"}} for one team."""
+        zeros = [0] * len(self.years)
+        salary = self.salary.get(manager_id, zeros)
+        players = self.players.get(manager_id, zeros)
+
+        return {
+            year: {
+                "salary": salary[i],
+                "players": players[i],
+                "cap": self.caps[i],
+                "cap_space": self.caps[i] - salary[i],
+            }
+            for i, year in enumerate(self.years)
+        }
+
+
+def _get_fingerprint():
+    # Changes whenever a player is signed, released, traded or has their contract edited
+    rostered = Player.manager_id.is_not(None)
+    return tuple(
+        db.session.execute(
+            db.select(
+                db.func.count(Player.id),
+                db.func.coalesce(db.func.sum(Player.salary), 0),
+                db.func.coalesce(db.func.sum(Player.contract), 0),
+                db.func.coalesce(db.func.sum(Player.manager_id * Player.id), 0),
+            ).where(rostered)
+        ).one()
+    )
+
+
+def invalidate_salary_projection():
+    """Drop this process's projection so it is rebuilt on the next use."""
+    global _projection
+    _projection = None
+
+
+def get_salary_projection():
+    """Get this process's salary projection, rebuilding it if it's stale."""
+    global _projection
+
+    config_version = get_config_snapshot().version
+    projection = _projection
+    now = time.monotonic()
+    if (
+        projection is not None
+        and projection.key[0] == config_version
+        and now - projection.checked_at < FINGERPRINT_CHECK_SECONDS
+    ):
+        return projection
+
+    key = (config_version, _get_fingerprint())
+    if projection is not None and projection.key == key and now - projection.built_at < PROJECTION_MAX_AGE_SECONDS:
+        projection.checked_at = now
+        return projection
+
+    with _projection_lock:
+        if _projection is None or _projection is projection:
+            rows = db.session.execute(
+                db.select(Player.manager_id, db.func.coalesce(Player.salary, 0), Player.contract)
+                .where(Player.manager_id.is_not(None))
+                .where(Player.contract.is_not(None))
+            )
+            _projection = SalaryProjection(get_salary_cap(), rows, key)
+        return _projection
@@ -0,0 +1,221 @@
+"""Read-only row objects for the list pages.
+
+The auction, roster, tiebreaker and player pool pages only display data, so
+they are built from plain column selects into namedtuples instead of ORM
+instances. The rows are immutable, skip the identity map and change tracking,
+and have no relationships, so a template can't trigger a lazy query.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy.orm import aliased
+
+from . import db
+from .model import Bid, Nomination, Player, Slot, User
+
+NominationRow = namedtuple(
+    "NominationRow",
+    [
+        "id",
+        "status",  # 'open', 'match' or 'closed'
+        "created_at",
+        "nominator_team_name",
+        "closes_at",
+        "round",
+        "player_id",
+        "player_name",
+        "player_team",
+        "player_position",
+        "manager_id",
+        "manager_team_name",
+        "matcher_id",
+        "matcher_team_name",
+        "hometown_discount",
+        "bid_values",  # Tuple of bid values, highest first
+        "user_bid_value",  # The current user's bid, or None
+    ],
+)
+
+RosterPlayerRow = namedtuple(
+    "RosterPlayerRow", ["id", "name", "team", "position", "salary", "contract", "nominated"]
+)
+
+PoolPlayerRow = namedtuple(
+    "PoolPlayerRow",
+    ["id", "name", "team", "position", "contract", "manager_id", "manager_short_team_name", "matcher_short_team_name"],
+)
+
+TeamRow = namedtuple("TeamRow", ["id", "team_name", "short_team_name", "tiebreaker_order"])
+
+_team_columns = (User.id, User.team_name, User.short_team_name, User.tiebreaker_order)
+
+
+def nominations_statement(user_id=None):
+    """Select every nomination's NominationRow columns except bid_values, in closing order."""
+    manager = aliased(User)
+    matcher = aliased(User)
+    nominator = aliased(User)
+    status = db.case(
+        (Player.manager_id.is_not(None), "closed"),
+        (
+            (Slot.closes_at < datetime.utcnow()) & Player.matcher_id.is_not(None),
+            "match",
+        ),
+        else_="open",
+    )
+    user_bid_value = db.null()
+    statement = (
+        db.select(
+            Nomination.id,
+            status.label("status"),
+            Nomination.created_at,
+            nominator.team_name,
+            Slot.closes_at,
+            Slot.round,
+            Player.id,
+            Player.name,
+            Player.team,
+            Player.position,
+            Player.manager_id,
+            manager.team_name,
+            Player.matcher_id,
+            matcher.team_name,
+            Player.hometown_discount,
+        )
+        .join(Player, Nomination.player_id == Player.id)
+        .join(Slot, Nomination.slot_id == Slot.id)
+        .join(nominator, Nomination.nominator_id == nominator.id)
+        .outerjoin(manager, Player.manager_id == manager.id)
+        .outerjoin(matcher, Player.matcher_id == matcher.id)
+        .order_by(Slot.closes_at)
+    )
+    if user_id is not None:
+        user_bid_value = Bid.value
+        statement = statement.outerjoin(
+            Bid, (Bid.nomination_id == Nomination.id) & (Bid.user_id == user_id)
+        )
+
+    return statement.add_columns(user_bid_value)
+
+
+def bid_values_statement(nomination_ids):
+    """Select the bid values of the nominations, highest first.
+
+    Reads only the listed nominations' bids, through the (nomination_id, value) index.
+    """
+    return (
+        db.select(Bid.nomination_id, Bid.value)
+        .where(Bid.nomination_id.in_(nomination_ids))
+        .where(Bid.value.is_not(None))
+        .order_by(Bid.nomination_id, Bid.value.desc())
+    )
+
+
+def get_nominations_by_status(user_id=None):
+    """Get every nomination as a NominationRow, grouped by status in closing order.
+
+    Args:
+        user_id: User whose bid is included as user_bid_value, if any
+
+    Returns:
+        Dict of status ('open', 'match', 'closed') -> list of NominationRows
+    """
+    rows = db.session.execute(nominations_statement(user_id)).all()
+
+    bid_values = dict()
+    if rows:
+        for nomination_id, value in db.session.execute(bid_values_statement([row[0] for row in rows])):
+            bid_values.setdefault(nomination_id, list()).append(value)
+
+    nominations_by_status = {"open": list(), "match": list(), "closed": list()}
+    for row in rows:
+        *columns, user_bid = row
+        nomination = NominationRow(*columns, tuple(bid_values.get(row[0], ())), user_bid)
+        nominations_by_status[nomination.status].append(nomination)
+
+    return nominations_by_status
+
+
+def get_team(short_team_name):
+    """Get the TeamRow for a short team name, or None."""
+    row = db.session.execute(
+        db.select(*_team_columns).where(User.short_team_name == short_team_name)
+    ).first()
+
+    return TeamRow(*row) if row else None
+
+
+def get_teams():
+    """Get a TeamRow for every user in team name order."""
+    rows = db.session.execute(db.select(*_team_columns).order_by(User.team_name))
+
+    return [TeamRow(*row) for row in rows]
+
+
+def get_teams_in_tiebreaker_order():
+    """Get a TeamRow for every user in tiebreaker order."""
+    rows = db.session.execute(db.select(*_team_columns).order_by(User.tiebreaker_order))
+
+    return [TeamRow(*row) for row in rows]
+
+
+def roster_statement(short_team_name):
+    """Select the RosterPlayerRow columns of a team's players, highest salary first."""
+    nominated = db.exists().where(Nomination.player_id == Player.id)
+
+    return (
+        db.select(
+            Player.id,
+            Player.name,
+            Player.team,
+            Player.position,
+            Player.salary,
+            Player.contract,
+            nominated,
+        )
+        .join(User, Player.manager_id == User.id)
+        .where(User.short_team_name == short_team_name)
+        .order_by(db.sql.expression.nullsfirst(db.sql.desc(Player.salary)))
+        .order_by(Player.contract.desc())
+    )
+
+
+def get_roster(short_team_name):
+    """Get a RosterPlayerRow for each player on a team, highest salary first."""
+    rows = db.session.execute(roster_statement(short_team_name))
+
+    return [RosterPlayerRow(*row) for row in rows]
+
+
+def pool_players_statement(statement):
+    """Select the PoolPlayerRow columns for a player pool statement's players."""
+    manager = aliased(User)
+    matcher = aliased(User)
+
+    return (
+        statement.with_only_columns(
+            Player.id,
+            Player.name,
+            Player.team,
+            Player.position,
+            Player.contract,
+            Player.manager_id,
+            manager.short_team_name,
+            matcher.short_team_name,
+        )
+        .outerjoin(manager, Player.manager_id == manager.id)
+        .outerjoin(matcher, Player.matcher_id == matcher.id)
+    )
+
+
+def get_pool_players(statement):
+    """Get a PoolPlayerRow for each player selected by a player pool statement.
+
+    Args:
+        statement: select() of Player.id with the page's filters, order and limit
+
+    Returns:
+        List of PoolPlayerRows in the statement's order
+    """
+    return [PoolPlayerRow(*row) for row in db.session.execute(pool_players_statement(statement))]
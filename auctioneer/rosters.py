@@ -1,8 +1,9 @@
 from flask import Blueprint, flash, g, redirect, render_template, url_for
 
 from . import db
-from .config import get_salary_cap
-from .model import Player, User
+from .model import User
+from .projections import get_salary_projection
+from .read_models import get_roster, get_team, get_teams
 
 bp = Blueprint("rosters", __name__, url_prefix="/rosters")
 
@@ -25,21 +26,8 @@ def index():
 
 @bp.route("/<string:team>/")
 def roster(team):
-    user = db.session.execute(
-        db.select(User).where(User.short_team_name == team.upper())
-    ).scalar()
-
-    players = (
-        db.session.execute(
-            db.select(Player)
-            .join(User, Player.manager_id == User.id)
-            .where(User.short_team_name == team.upper())
-            .order_by(db.sql.expression.nullsfirst(db.sql.desc(Player.salary)))
-            .order_by(Player.contract.desc())
-        )
-        .scalars()
-        .all()
-    )
+    user = get_team(team.upper())
+    players = get_roster(team.upper())
 
     short_team_names = (
         db.session.execute(
@@ -49,35 +37,31 @@ def roster(team):
         .all()
     )
 
-    salary_cap = get_salary_cap()
+    projection = get_salary_projection()
 
     # Check if salary cap is configured
-    if not salary_cap:
+    if not projection.years:
         flash("Salary cap is not configured. Please ask the league manager to configure it.", "error")
-        # Show empty roster state
-        team_salary = {}
-        min_year = None
-        max_year = None
-    else:
-        team_salary = {year: {"salary": 0, "players": 0} for year in salary_cap}
-        min_year = min(salary_cap.keys())
-        max_year = max(salary_cap.keys())
-    # Only calculate salary if config is set
-    if min_year is not None and max_year is not None:
-        for player in players:
-            if player.contract is None:
-                continue
-            year = min_year
-            while year <= player.contract and year <= max_year:
-                team_salary[year]["salary"] += player.salary
-                team_salary[year]["players"] += 1
-                year += 1
+
+    team_salary = projection.for_team(user.id) if user else {}
 
     return render_template(
         "rosters/roster.html",
         selected_user=user,
         players=players,
         teams=short_team_names,
-        salary_cap=salary_cap,
+        salary_cap=projection.salary_cap,
         team_salary=team_salary,
     )
+
+
+@bp.route("/cap-space/")
+def cap_space():
+    projection = get_salary_projection()
+
+    if not projection.years:
+        flash("Salary cap is not configured. Please ask the league manager to configure it.", "error")
+
+    teams = [(team, projection.for_team(team.id)) for team in get_teams()]
+
+    return render_template("rosters/cap_space.html", teams=teams, years=projection.years)
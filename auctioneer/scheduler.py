@@ -0,0 +1,190 @@
+"""Long-running scheduler that closes nominations and sends notifications on time.
+
+Replaces the per-minute cron invocations of close-nominations and
+send-notifications. The scheduler keeps a priority queue of upcoming auction
+close, match deadline and notification times and sleeps until the next one is
+due. Web workers wake it early with a UDP datagram whenever a commit touches
+slots, nominations, players or notifications, including bulk statements, so
+new deadlines are picked up immediately.
+"""
+
+import heapq
+import select
+import socket
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+
+from . import db
+from .commands import MATCH_WINDOW, close_nominations, get_notification_sender, send_notifications
+from .config import get_notification_digest_seconds
+from .database import on_commit_of
+from .model import Bid, Nomination, Notification, Player, Slot
+from .notifications import DIGEST_KINDS
+
+# Tables whose changes can move a deadline
+WAKE_TABLES = {"nomination", "notification", "player", "slot"}
+
+# Longest the scheduler sleeps without re-reading the queue from the database
+MAX_SLEEP_SECONDS = 60
+
+# Delay before retrying jobs that were due but did not complete (e.g. webhook down),
+# doubled after every further failure up to MAX_RETRY_SECONDS
+RETRY_SECONDS = 30
+MAX_RETRY_SECONDS = 15 * 60
+
+CLOSE_NOMINATIONS = "close-nominations"
+SEND_NOTIFICATIONS = "send-notifications"
+JOBS = (CLOSE_NOMINATIONS, SEND_NOTIFICATIONS)
+
+
+def init_app(app):
+    """Wake the scheduler after this process commits changes to WAKE_TABLES."""
+    on_commit_of(WAKE_TABLES, _wake_after_commit)
+
+
+def _wake_after_commit():
+    if has_app_context():
+        wake_scheduler(current_app.config["SCHEDULER_WAKE_ADDRESS"])
+
+
+def _parse_address(address):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def wake_scheduler(address):
+    """Tell a running scheduler to rebuild its queue. Never raises."""
+    if not address:
+        return
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"wake", _parse_address(address))
+    except OSError as e:
+        current_app.logger.warning(f"Unable to wake scheduler at {address}: {e}")
+
+
+def get_deadlines():
+    """Get (due_at, job) for every pending deadline.
+
+    Nominations without bids are left out: they can't be settled until an admin
+    steps in, and that commit wakes the scheduler.
+    """
+    closes = db.session.execute(
+        db.select(Slot.closes_at, Player.matcher_id)
+        .select_from(Nomination)
+        .join(Slot, Nomination.slot_id == Slot.id)
+        .join(Player, Nomination.player_id == Player.id)
+        .where(Player.manager_id.is_(None))
+        .where(db.exists().where(Bid.nomination_id == Nomination.id).where(Bid.value.is_not(None)))
+    )
+    sends = db.session.execute(
+        db.select(Notification.send_at, Notification.kind).where(Notification.sent.is_(False))
+    )
+    digest_delay = timedelta(seconds=get_notification_digest_seconds())
+
+    deadlines = list()
+    for row in closes:
+        deadlines.append((row.closes_at + MATCH_WINDOW if row.matcher_id else row.closes_at, CLOSE_NOMINATIONS))
+    for row in sends:
+        # Digest notifications are held until the digest window has passed
+        send_at = row.send_at + digest_delay if row.kind in DIGEST_KINDS else row.send_at
+        deadlines.append((send_at, SEND_NOTIFICATIONS))
+
+    return deadlines
+
+
+def get_retry_delay(attempts):
+    """Get the seconds to wait before retrying a job that has failed attempts times in a row."""
+    return min(RETRY_SECONDS * 2 ** (attempts - 1), MAX_RETRY_SECONDS)
+
+
+def build_queue(now, deadlines, retry_at):
+    """Build a heap of (due_at, job) from the deadlines.
+
+    Deadlines already due by now are scheduled at retry_at[job] when the job has
+    a pending retry, and immediately otherwise.
+    """
+    queue = [
+        (max(due_at, retry_at[job]) if due_at <= now and job in retry_at else due_at, job)
+        for due_at, job in deadlines
+    ]
+    heapq.heapify(queue)
+
+    return queue
+
+
+def run_jobs(jobs):
+    if CLOSE_NOMINATIONS in jobs:
+        nominations = close_nominations()
+        click.echo(f"{datetime.utcnow().isoformat()}: Closed {len(nominations)} nominations.")
+
+    if SEND_NOTIFICATIONS in jobs:
+        notification_type, webhook_url, notification_module = get_notification_sender()
+        notifications = send_notifications(webhook_url, notification_module)
+        click.echo(
+            f"{datetime.utcnow().isoformat()}: Sent {len(notifications)} notifications via {notification_type}."
+        )
+
+
+def run_scheduler(address):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(_parse_address(address))
+    sock.setblocking(False)
+
+    attempts = dict()  # job -> passes in a row that left its due deadlines unfinished
+    retry_at = dict()  # job -> when its unfinished deadlines are next attempted
+
+    # Run everything once at startup to catch up on anything missed while down
+    jobs = set(JOBS)
+    while True:
+        started_at = datetime.utcnow()
+        try:
+            run_jobs(jobs)
+            deadlines = get_deadlines()
+        except Exception as e:
+            current_app.logger.error(f"Scheduler pass for {sorted(jobs)} failed: {e}")
+            # Count the pass as a failed attempt of every job so they are all retried
+            jobs = set(JOBS)
+            deadlines = [(started_at, job) for job in jobs]
+        finally:
+            # End the transaction so the next pass sees other workers' commits
+            db.session.remove()
+
+        # Back off jobs that keep leaving due deadlines behind (e.g. webhook down)
+        unfinished = {job for due_at, job in deadlines if due_at <= started_at}
+        for job in JOBS:
+            if job in jobs and job in unfinished:
+                attempts[job] = attempts.get(job, 0) + 1
+                retry_at[job] = started_at + timedelta(seconds=get_retry_delay(attempts[job]))
+                current_app.logger.warning(f"Scheduler retrying {job} at {retry_at[job].isoformat()}.")
+            elif job not in unfinished:
+                attempts.pop(job, None)
+                retry_at.pop(job, None)
+
+        queue = build_queue(started_at, deadlines, retry_at)
+        timeout = MAX_SLEEP_SECONDS
+        if queue:
+            seconds_until_due = (queue[0][0] - datetime.utcnow()).total_seconds()
+            timeout = min(timeout, max(0.0, seconds_until_due))
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if readable:
+            while True:
+                try:
+                    sock.recv(64)
+                except BlockingIOError:
+                    break
+
+        now = datetime.utcnow()
+        jobs = set()
+        while queue and queue[0][0] < now:
+            jobs.add(heapq.heappop(queue)[1])
+
+
+@click.command("run-scheduler")
+def run_scheduler_command():
+    """Close nominations and send notifications as they come due, until stopped."""
+    address = current_app.config["SCHEDULER_WAKE_ADDRESS"]
+    click.echo(f"{datetime.utcnow().isoformat()}: Scheduler listening for wake-ups on {address}.")
+    run_scheduler(address)
@@ -0,0 +1,206 @@
+"""Player search backed by an in-memory prefix index.
+
+Each process keeps a prefix index over player name, team and position so the
+nominate and player pool pages can search the pool without rendering every
+player. The index only decides which players match and in what order; the
+rows returned are always read fresh from the database. It is rebuilt after
+this process commits player changes, when another process adds, removes or
+edits players (noticed within FINGERPRINT_CHECK_SECONDS), and at least every
+INDEX_MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+
+from flask import Blueprint, jsonify, request
+from . import db
+from .auth import login_required
+from .database import on_commit_of
+from .model import Nomination, Player
+
+bp = Blueprint("search", __name__, url_prefix="/search")
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+# How often searches check the database for player changes made by other processes
+FINGERPRINT_CHECK_SECONDS = 5
+
+# Backstop for edits by other processes that the fingerprint doesn't reflect
+INDEX_MAX_AGE_SECONDS = 300
+
+# Candidates checked against the database per batch when filtering search results
+CANDIDATE_BATCH_SIZE = 200
+
+PlayerEntry = namedtuple("PlayerEntry", ["id", "name", "team", "position"])
+
+_index = None
+_index_lock = threading.Lock()
+
+
+@bp.route("/players/")
+@login_required
+def players():
+    """Search players by name, team or position.
+
+    Query args: q (search text), available (only unnominated free agents when
+    set) and limit. Returns results in the format select2 expects.
+    """
+    query = request.args.get("q", "")
+    available_only = request.args.get("available", "") not in ("", "0", "false")
+    limit = min(max(request.args.get("limit", DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+    results = search_players(query, limit, available_only=available_only)
+
+    return jsonify(
+        {
+            "results": [
+                {
+                    "id": player.id,
+                    "text": f"{player.name} | {player.team} | {player.position.replace(',', ', ')}",
+                    "name": player.name,
+                    "team": player.team,
+                    "position": player.position,
+                }
+                for player in results
+            ]
+        }
+    )
+
+
+def init_app(app):
+    """Rebuild the index after this process commits player changes."""
+    on_commit_of({Player.__tablename__}, invalidate_player_index)
+
+
+def normalize(text):
+    """Lowercase text and strip accents and punctuation, e.g. "José O'Neil" -> "jose oneil"."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return "".join(c for c in text.lower() if c.isalnum() or c.isspace() or c == ",")
+
+
+def tokenize(text):
+    return normalize(text).replace(",", " ").split()
+
+
+class PlayerIndex:
+    """Prefix index over player name, team and position tokens.
+
+    Entries are kept sorted by name and each prefix maps to the sorted
+    positions of the entries with a token starting with it, so single-token
+    queries need no sorting at all.
+    """
+
+    def __init__(self, entries, fingerprint):
+        self.fingerprint = fingerprint
+        self.built_at = self.checked_at = time.monotonic()
+        self.entries = sorted(entries, key=lambda entry: (normalize(entry.name), entry.id))
+        self.names = [normalize(entry.name) for entry in self.entries]
+
+        prefixes = dict()
+        for position, entry in enumerate(self.entries):
+            tokens = set(tokenize(entry.name)) | set(tokenize(entry.team)) | set(tokenize(entry.position))
+            for prefix in {token[:i] for token in tokens for i in range(1, len(token) + 1)}:
+                prefixes.setdefault(prefix, list()).append(position)
+        self.prefixes = prefixes
+
+    def search(self, query):
+        """Get the ids of entries matching every token in the query, best first.
+
+        Players whose full name starts with the query come first, then the rest
+        in name order.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return list()
+
+        postings = sorted((self.prefixes.get(token, ()) for token in tokens), key=len)
+        if len(postings) == 1:
+            positions = postings[0]
+        else:
+            matched = set(postings[0]).intersection(*postings[1:])
+            positions = sorted(matched)
+
+        name_query = " ".join(tokens)
+        leading = [position for position in positions if self.names[position].startswith(name_query)]
+        if leading:
+            leading_set = set(leading)
+            positions = leading + [position for position in positions if position not in leading_set]
+
+        return [self.entries[position].id for position in positions]
+
+
+def _get_fingerprint():
+    # Changes whenever players are added, removed or edited, by any process
+    return tuple(
+        db.session.execute(
+            db.select(db.func.count(Player.id), db.func.max(Player.id), db.func.max(Player.updated_at))
+        ).one()
+    )
+
+
+def invalidate_player_index():
+    """Drop this process's index so it is rebuilt on the next search."""
+    global _index
+    _index = None
+
+
+def get_player_index():
+    """Get this process's player index, rebuilding it if it's stale."""
+    global _index
+
+    index = _index
+    now = time.monotonic()
+    if index is not None and now - index.checked_at < FINGERPRINT_CHECK_SECONDS:
+        return index
+
+    fingerprint = _get_fingerprint()
+    if index is not None and index.fingerprint == fingerprint and now - index.built_at < INDEX_MAX_AGE_SECONDS:
+        index.checked_at = now
+        return index
+
+    with _index_lock:
+        if _index is None or _index is index:
+            rows = db.session.execute(db.select(Player.id, Player.name, Player.team, Player.position))
+            _index = PlayerIndex([PlayerEntry(*row) for row in rows], fingerprint)
+        return _index
+
+
+def candidates_statement(candidate_ids, available_only=False):
+    """Select a batch of the index's candidates, optionally only available ones."""
+    statement = db.select(Player).where(Player.id.in_(candidate_ids))
+    if available_only:
+        statement = statement.where(Player.manager_id.is_(None)).where(
+            ~db.exists().where(Nomination.player_id == Player.id)
+        )
+
+    return statement
+
+
+def search_players(query, limit=DEFAULT_LIMIT, available_only=False):
+    """Search players by name, team and position.
+
+    Args:
+        query: Search text; every word must be the start of a word in the player's
+            name, team or position
+        limit: Maximum number of players returned
+        available_only: Only return free agents that haven't been nominated
+
+    Returns:
+        List of players, best match first
+    """
+    candidate_ids = get_player_index().search(query)
+
+    players = list()
+    for start in range(0, len(candidate_ids), CANDIDATE_BATCH_SIZE):
+        batch = candidate_ids[start:start + CANDIDATE_BATCH_SIZE]
+        statement = candidates_statement(batch, available_only)
+        players_by_id = {player.id: player for player in db.session.execute(statement).scalars()}
+        players.extend(players_by_id[id] for id in batch if id in players_by_id)
+        if len(players) >= limit:
+            break
+
+    return players[:limit]
@@ -1,12 +1,21 @@
 from datetime import datetime, timedelta
 
 import pytz
-from flask import current_app
-from slack_sdk import WebhookClient
 
 from . import db
 from .config import get_notification_alert_minutes
 from .model import Notification
+from .notifications import (
+    AUCTION_MATCH,
+    AUCTION_WON,
+    AUCTIONS_CLOSE,
+    NOMINATION_PERIOD_BEGUN,
+    NOMINATION_PERIOD_END,
+    PLAYER_NOMINATED,
+    get_dedupe_key,
+    save_notification,
+)
+from .utils import get_winning_bid
 
 
 def add_nomination_period_begun_notification(
@@ -26,21 +35,17 @@ def add_nomination_period_begun_notification(
             f"{nominations_close_at_et.strftime('%Y-%m-%d @ %-I:%M %p')} ET at <https://thedooauction.com|thedooauction.com>"
         ),
         send_at=nominations_open_at,
+        kind=NOMINATION_PERIOD_BEGUN,
+        round=int(round_number),
+        dedupe_key=get_dedupe_key(NOMINATION_PERIOD_BEGUN, int(round_number)),
     )
 
-    db.session.add(notification)
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
 
 
-def remove_nomination_period_begun_notification(round_number):
-    db.session.query(Notification).where(
-        Notification.title.contains(f"Round {round_number} nomination period has begun")
-    ).delete(synchronize_session=False)
-    db.session.commit()
-
-
 def add_nomination_period_end_notification(
     round_number, nominations_close_at, alert_minutes=None
 ):
@@ -62,21 +67,17 @@ def add_nomination_period_end_notification(
             f"at <https://thedooauction.com|thedooauction.com>"
         ),
         send_at=nominations_close_at - timedelta(minutes=alert_minutes),
+        kind=NOMINATION_PERIOD_END,
+        round=int(round_number),
+        dedupe_key=get_dedupe_key(NOMINATION_PERIOD_END, int(round_number)),
     )
 
-    db.session.add(notification)
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
 
 
-def remove_nomination_period_end_notification(round_number):
-    db.session.query(Notification).where(
-        Notification.title.contains(f"Round {round_number} nomination period ends")
-    ).delete(synchronize_session=False)
-    db.session.commit()
-
-
 def add_auctions_close_notification(
     round_number, auctions_start_closing_at, alert_minutes=None
 ):
@@ -92,48 +93,69 @@ def add_auctions_close_notification(
             f"{alert_minutes} minutes. Get your bids in!"
         ),
         send_at=auctions_start_closing_at - timedelta(minutes=alert_minutes),
+        kind=AUCTIONS_CLOSE,
+        round=int(round_number),
+        dedupe_key=get_dedupe_key(AUCTIONS_CLOSE, int(round_number)),
     )
 
-    db.session.add(notification)
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
 
 
-def remove_auctions_close_notification(round_number):
-    db.session.query(Notification).where(
-        Notification.title.contains(f"Round {round_number} auctions close")
-    ).delete(synchronize_session=False)
-    db.session.commit()
+PLAYER_NOMINATED_TITLE = ":mega:  A player has been nominated!"
+AUCTION_WON_TITLE = ":moneybag:  An auction has been won!"
+
+# Titles for notification kinds merged into one message per send window
+DIGEST_TITLES = {
+    PLAYER_NOMINATED: ":mega:  Players have been nominated!",
+    AUCTION_WON: ":moneybag:  Auctions have been won!",
+}
+
+# Slack rejects section blocks with more than 3000 characters of text
+MESSAGE_LIMIT = 3000
 
 
 def add_player_nominated_notification(nomination):
     user_mention = f"<@{nomination.nominator_user.slack_id}>" if nomination.nominator_user.slack_id else nomination.nominator_user.team_name
     notification = Notification(
-        title=":mega:  A player has been nominated!",
+        title=PLAYER_NOMINATED_TITLE,
         message=(
             f"{user_mention} has nominated {str(nomination)}"
         ),
         send_at=datetime.utcnow(),
+        kind=PLAYER_NOMINATED,
+        nomination_id=nomination.id,
+        dedupe_key=get_dedupe_key(PLAYER_NOMINATED, nomination.id),
     )
 
-    db.session.add(notification)
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
 
 
-def add_auction_won_notification(nomination):
-    notification = Notification(
-        title=":moneybag:  An auction has been won!",
+def build_auction_won_notification(nomination, winning_bid_value):
+    return Notification(
+        title=AUCTION_WON_TITLE,
         message=(
             f"<@{nomination.player.manager_user.slack_id}> has won the auction for "
-            f"{str(nomination)} with a bid of ${nomination.bids[0].value}!"
+            f"{str(nomination)} with a bid of ${winning_bid_value}!"
         ),
         send_at=datetime.utcnow(),
+        kind=AUCTION_WON,
+        nomination_id=nomination.id,
+        dedupe_key=get_dedupe_key(AUCTION_WON, nomination.id),
     )
 
-    db.session.add(notification)
+
+def add_auction_won_notification(nomination, winning_bid_value=None):
+    if winning_bid_value is None:
+        winning_bid_value = get_winning_bid(nomination.id).value
+    notification = build_auction_won_notification(nomination, winning_bid_value)
+
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
@@ -152,34 +174,17 @@ def add_auction_match_notification(nomination, match_time_hours):
             f"accept or decline to match the highest bid for {str(nomination)}."
         ),
         send_at=nomination.slot.closes_at,
+        kind=AUCTION_MATCH,
+        nomination_id=nomination.id,
+        dedupe_key=get_dedupe_key(AUCTION_MATCH, nomination.id),
     )
 
-    db.session.add(notification)
+    notification = save_notification(notification)
     db.session.commit()
 
     return notification
 
 
-def remove_auction_match_notification(nomination):
-    notifications = db.session.execute(
-        db.select(Notification)
-        .where(Notification.title.is_(MATCH_NOTIFICATION_TITLE))
-        .where(Notification.message.contains(str(nomination)))
-        .where(Notification.sent.is_(False))
-    )
-    notification_count = 0
-    for notification in notifications.scalars():
-        notification_count += 1
-        db.session.delete(notification)
-
-    db.session.commit()
-    if notification_count > 1:
-        current_app.logger.warning(
-            f"Multiple auction match notifications for nomination {nomination}: "
-            f"{notifications}."
-        )
-
-
 def format_slack_rounds(title, message):
     return [
         {"type": "section", "text": {"type": "mrkdwn", "text": title}},
@@ -188,19 +193,14 @@ def format_slack_rounds(title, message):
     ]
 
 
-def send_notification(notification, webhook_url):
-    webhook = WebhookClient(webhook_url)
-    response = webhook.send(
-        text=notification.title,
-        blocks=format_slack_rounds(notification.title, notification.message),
-    )
-    if response.status_code == 200:
-        notification.sent = True
-        db.session.add(notification)
-        db.session.commit()
-        return True
-    else:
-        current_app.logger.error(
-            f"Failed to send notification {notification} with response {response}."
-        )
-        return False
+def message_length(title, messages):
+    """Get the length of the message section text for a list of message lines."""
+    return sum(len(message) + 1 for message in messages) - 1
+
+
+def build_payload(title, messages):
+    """Build the Slack incoming webhook payload for a title and one or more message lines."""
+    return {
+        "text": title,
+        "blocks": format_slack_rounds(title, "\n".join(messages)),
+    }
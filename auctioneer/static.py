@@ -1,8 +1,134 @@
+"""Static assets, fingerprinted at build time.
+
+build-assets copies every file in the static folder to static/build/ under a
+name containing a hash of its contents (style.css -> style.3f2a9c81d0b4.css),
+writes gzip and, when the brotli package is installed, brotli variants next to
+each one, and records the names in build/manifest.json. Once a manifest
+exists, url_for("static", filename="style.css") emits the fingerprinted name,
+so the files can be cached forever and nginx can serve them without reaching
+the app. Without a manifest (e.g. in development) the plain names are used.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+import click
 from flask import Blueprint, current_app, send_from_directory
 
+try:
+    import brotli
+except ImportError:  # Optional: only needed to write .br variants
+    brotli = None
+
 bp = Blueprint("static", __name__, url_prefix="/static")
 
+BUILD_DIRECTORY = "build"
+MANIFEST_FILENAME = "manifest.json"
+
+# Files at least this big get precompressed variants
+COMPRESS_MIN_BYTES = 256
+
+# Extensions that are already compressed and aren't worth precompressing
+COMPRESSED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2"}
+
+HASH_LENGTH = 12
+
+_manifest = None
+
 
 @bp.route("/<path:filename>")
 def staticfiles(filename):
     return send_from_directory(current_app.config["STATIC_FOLDER"], filename)
+
+
+def init_app(app):
+    """Make url_for emit fingerprinted static file names once assets are built."""
+    app.url_defaults(_fingerprint_static_url)
+
+
+def _fingerprint_static_url(endpoint, values):
+    if endpoint not in ("static", "static.staticfiles") or "filename" not in values:
+        return
+
+    filename = get_manifest().get(values["filename"])
+    if filename is not None:
+        values["filename"] = filename
+
+
+def get_manifest():
+    """Get this process's manifest of file name -> fingerprinted path in the static folder."""
+    global _manifest
+
+    if _manifest is None:
+        path = os.path.join(current_app.config["STATIC_FOLDER"], BUILD_DIRECTORY, MANIFEST_FILENAME)
+        try:
+            with open(path) as file:
+                _manifest = json.load(file)
+        except FileNotFoundError:
+            _manifest = dict()
+
+    return _manifest
+
+
+def _fingerprinted_name(filename, data):
+    stem, extension = os.path.splitext(filename)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}"
+
+
+def build_assets(static_folder):
+    """Write fingerprinted copies and compressed variants of every static file.
+
+    Args:
+        static_folder: Folder with the source files; the output is written to
+            its build/ subfolder, which is replaced
+
+    Returns:
+        The manifest, a dict of source file name -> fingerprinted path
+    """
+    build_folder = os.path.join(static_folder, BUILD_DIRECTORY)
+    shutil.rmtree(build_folder, ignore_errors=True)
+
+    manifest = dict()
+    for root, directories, filenames in os.walk(static_folder):
+        directories[:] = sorted(d for d in directories if os.path.join(root, d) != build_folder)
+        for filename in sorted(filenames):
+            source = os.path.join(root, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            with open(source, "rb") as file:
+                data = file.read()
+
+            fingerprinted = f"{BUILD_DIRECTORY}/{_fingerprinted_name(name, data)}"
+            target = os.path.join(static_folder, fingerprinted)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as file:
+                file.write(data)
+
+            if len(data) >= COMPRESS_MIN_BYTES and os.path.splitext(name)[1].lower() not in COMPRESSED_EXTENSIONS:
+                # mtime=0 keeps the output identical between builds of the same file
+                with open(f"{target}.gz", "wb") as file:
+                    file.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(f"{target}.br", "wb") as file:
+                        file.write(brotli.compress(data))
+
+            manifest[name] = fingerprinted
+
+    with open(os.path.join(build_folder, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+    return manifest
+
+
+@click.command("build-assets")
+def build_assets_command():
+    """Write fingerprinted, precompressed static files and their manifest."""
+    global _manifest
+
+    manifest = build_assets(current_app.config["STATIC_FOLDER"])
+    _manifest = None
+    if brotli is None:
+        click.echo("The brotli package is not installed, so no .br files were written.")
+    click.echo(f"Built {len(manifest)} static files.")
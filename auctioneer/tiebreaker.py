@@ -9,18 +9,20 @@ from flask import (
     url_for,
 )
 
+from sqlalchemy.orm.attributes import set_committed_value
+
 from . import db
 from .audit_log import log_tiebreaker_update
 from .auth import admin_required, login_required
 from .model import User
+from .read_models import get_teams_in_tiebreaker_order
 
 bp = Blueprint("tiebreaker", __name__, url_prefix="/tiebreaker")
 
 
 @bp.route("/")
 def index():
-    query = db.select(User).order_by(User.tiebreaker_order)
-    users = db.session.execute(query).scalars().all()
+    users = get_teams_in_tiebreaker_order()
     return render_template("tiebreaker/index.html", users=users)
 
 
@@ -50,17 +52,12 @@ def edit():
 
                 if tiebreaker_order != user.tiebreaker_order:
                     old_values[user.id] = user.tiebreaker_order
-                    user.tiebreaker_order = None
                     updates[user.id] = tiebreaker_order
 
         if error is None and updates:
-            db.session.add_all(users)
-            db.session.flush()
-            for user_id, tiebreaker_order in updates.items():
-                user = db.session.get(User, user_id)
-                user.tiebreaker_order = tiebreaker_order
-                db.session.add(user)
             try:
+                apply_tiebreaker_permutation(updates)
+
                 # Log audit events for each changed user
                 for user_id, new_order in updates.items():
                     old_order = old_values[user_id]
@@ -79,29 +76,87 @@ def edit():
     return render_template("tiebreaker/edit.html", users=users)
 
 
+def dropped_tiebreaker_orders(orders, user_id):
+    """Get the tiebreaker orders after dropping a user to the bottom.
+
+    Args:
+        orders: Dict of user id -> tiebreaker order (or None)
+        user_id: The user to move to the bottom
+
+    Returns:
+        A new dict where everyone below the user moves up one spot
+    """
+    dropped_order = orders[user_id]
+    if dropped_order is None:
+        return orders
+
+    below = {uid: order for uid, order in orders.items() if order is not None and order > dropped_order}
+    if not below:
+        return orders
+
+    new_orders = dict(orders)
+    for uid, order in below.items():
+        new_orders[uid] = order - 1
+    new_orders[user_id] = max(below.values())
+
+    return new_orders
+
+
+def apply_tiebreaker_permutation(orders):
+    """Move users to new tiebreaker orders with two set-based UPDATEs.
+
+    Runs inside the caller's transaction and doesn't commit, so any number of
+    drops or an admin edit can be applied in one go. The unique constraint is
+    checked row by row, so the changed users are first parked on the negated
+    new orders, which can't clash with the positive orders in use, and then
+    flipped back. Raises IntegrityError if a new order is held by a user
+    outside the permutation.
+
+    Args:
+        orders: Dict of user id -> new tiebreaker order (or None) for the users
+            whose order changes
+    """
+    if not orders:
+        return
+
+    user_ids = list(orders)
+    db.session.execute(
+        db.update(User)
+        .where(User.id.in_(user_ids))
+        .values(tiebreaker_order=-db.case(orders, value=User.id))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.update(User)
+        .where(User.id.in_(user_ids))
+        .values(tiebreaker_order=-User.tiebreaker_order)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Bring users already loaded in this session up to date without a refresh
+    for user_id, order in orders.items():
+        user = db.session.identity_map.get(db.session.identity_key(User, user_id))
+        if user is not None:
+            set_committed_value(user, "tiebreaker_order", order)
+
+
+def apply_tiebreaker_orders(users, orders):
+    """Write new tiebreaker orders for users within the current transaction.
+
+    Args:
+        users: Users with their current tiebreaker orders
+        orders: Dict of user id -> new tiebreaker order, e.g. from
+            dropped_tiebreaker_orders
+    """
+    apply_tiebreaker_permutation(
+        {user.id: orders[user.id] for user in users if user.tiebreaker_order != orders[user.id]}
+    )
+
+
 def drop_to_tiebreaker_bottom(winning_user):
-    users = db.session.execute(db.select(User)).scalars().all()
-
-    updates = dict()
-    max_tiebreaker_order = 0
-    for user in users:
-        if (
-            user.tiebreaker_order is not None
-            and user.tiebreaker_order > winning_user.tiebreaker_order
-        ):
-            if user.tiebreaker_order > max_tiebreaker_order:
-                max_tiebreaker_order = user.tiebreaker_order
-            updates[user.id] = user.tiebreaker_order - 1
-            user.tiebreaker_order = None
-
-    if updates:
-        updates[winning_user.id] = max_tiebreaker_order
-        winning_user.tiebreaker_order = None
-
-        db.session.add_all(users)
-        db.session.flush()
-        for user_id, tiebreaker_order in updates.items():
-            user = db.session.get(User, user_id)
-            user.tiebreaker_order = tiebreaker_order
-            db.session.add(user)
-        db.session.commit()
+    orders = dict(db.session.execute(db.select(User.id, User.tiebreaker_order)).all())
+    new_orders = dropped_tiebreaker_orders(orders, winning_user.id)
+    apply_tiebreaker_permutation(
+        {user_id: order for user_id, order in new_orders.items() if order != orders[user_id]}
+    )
+    db.session.commit()
@@ -1,40 +1,158 @@
 import csv
+from collections import namedtuple
 from datetime import datetime, timedelta
 
 from . import db
 from .config import get_max_nominations_normal, get_max_nominations_urgent, get_urgent_threshold_hours
+from .database import get_insert
+from .importer import FantraxExportParser
 from .model import Bid, Nomination, Player, Slot, User
 
 
+def user_bid_statement(user_id, nomination_id):
+    return db.select(Bid).where(Bid.user_id == user_id).where(Bid.nomination_id == nomination_id)
+
+
 def get_user_bid_for_nomination(user_id, nomination_id):
-    bid = db.session.execute(
-        db.select(Bid)
-        .where(Bid.user_id == user_id)
-        .where(Bid.nomination_id == nomination_id)
-    ).scalar()
+    bid = db.session.execute(user_bid_statement(user_id, nomination_id)).scalar()
 
     return bid
 
 
-def get_open_slots(in_nomination_period_only=False):
+def bids_statement(nomination_ids):
+    return db.select(Bid).where(Bid.nomination_id.in_(nomination_ids))
+
+
+def get_bids_by_user(nomination_ids):
+    """Get every user's bid on many nominations in one query.
+
+    Returns a dict of nomination id -> dict of user id -> Bid. Nominations
+    without any bids are left out.
+    """
+    bids_by_user = dict()
+    for bid in db.session.execute(bids_statement(nomination_ids)).scalars():
+        bids_by_user.setdefault(bid.nomination_id, dict())[bid.user_id] = bid
+
+    return bids_by_user
+
+
+def set_user_bid(user_id, nomination_id, value):
+    """Create, update or, for a None value, delete a user's bid on a nomination.
+
+    Only real bids are stored, so a user without a bid has no row at all. The
+    bid is written with one INSERT ... ON CONFLICT against the unique (user_id,
+    nomination_id) index, so concurrent submits by the same user can't add a
+    second row. The caller is responsible for committing.
+    """
+    if value is None:
+        db.session.execute(
+            db.delete(Bid).where(Bid.user_id == user_id).where(Bid.nomination_id == nomination_id)
+        )
+        return
+
+    table = Bid.__table__
+    statement = get_insert(table).values(user_id=user_id, nomination_id=nomination_id, value=value)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.nomination_id],
+            set_={"value": statement.excluded.value},
+        )
+    )
+
+
+WinningBid = namedtuple("WinningBid", ["value", "user_ids", "runner_up_value"])
+
+
+def top_bids_statement(nomination_ids):
+    """Select the bids on the top two values of each nomination, best first.
+
+    Bids are ranked per nomination with a window function so only the top two
+    bid values are returned from the database.
+    """
+    value_rank = (
+        db.func.dense_rank()
+        .over(partition_by=Bid.nomination_id, order_by=Bid.value.desc())
+        .label("value_rank")
+    )
+    ranked_bids = (
+        db.select(Bid.nomination_id, Bid.user_id, Bid.value, User.tiebreaker_order, value_rank)
+        .join(User, Bid.user_id == User.id)
+        .where(Bid.nomination_id.in_(nomination_ids))
+        .where(Bid.value.is_not(None))
+        .subquery()
+    )
+
+    return (
+        db.select(ranked_bids)
+        .where(ranked_bids.c.value_rank <= 2)
+        .order_by(
+            ranked_bids.c.value_rank,
+            ranked_bids.c.tiebreaker_order.is_(None),
+            ranked_bids.c.tiebreaker_order,
+            ranked_bids.c.user_id,
+        )
+    )
+
+
+def get_winning_bids(nomination_ids):
+    """Resolve the winning bid of many nominations in one query.
+
+    Returns a dict of nomination id -> WinningBid, where user_ids lists every user
+    tied on the winning value in tiebreaker order and runner_up_value is the next
+    highest bid (equal to value when tied, None for a single bid). Nominations
+    without any bids are left out.
+    """
+    rows = db.session.execute(top_bids_statement(nomination_ids))
+
+    top_bids = dict()
+    runner_up_values = dict()
+    for row in rows:
+        if row.value_rank == 1:
+            if row.nomination_id not in top_bids:
+                top_bids[row.nomination_id] = (row.value, list())
+            top_bids[row.nomination_id][1].append(row.user_id)
+        else:
+            runner_up_values[row.nomination_id] = row.value
+
+    winning_bids = dict()
+    for nomination_id, (value, user_ids) in top_bids.items():
+        runner_up_value = value if len(user_ids) > 1 else runner_up_values.get(nomination_id)
+        winning_bids[nomination_id] = WinningBid(value, user_ids, runner_up_value)
+
+    return winning_bids
+
+
+def get_winning_bid(nomination_id):
+    """Resolve the winning bid of one nomination, or None if it has no bids."""
+    return get_winning_bids([nomination_id]).get(nomination_id)
+
+
+def open_slots_statement(in_nomination_period_only=False):
     statement = db.select(Slot).where(~db.exists().where(Nomination.slot_id == Slot.id))
     if in_nomination_period_only:
         statement = statement.where(Slot.nomination_opens_at <= datetime.utcnow())
         statement = statement.where(Slot.nomination_closes_at >= datetime.utcnow())
-    slots = db.session.execute(statement).scalars().all()
+
+    return statement
+
+
+def get_open_slots(in_nomination_period_only=False):
+    slots = db.session.execute(open_slots_statement(in_nomination_period_only)).scalars().all()
 
     return slots
 
 
-def user_can_nominate(user, slot):
-    statement = (
+def nominations_per_round_statement(user_id):
+    return (
         db.select(Slot.round, db.func.count("*"))
         .select_from(Nomination)
         .join(Slot)
-        .where(Nomination.nominator_id == user.id)
+        .where(Nomination.nominator_id == user_id)
     ).group_by(Slot.round)
 
-    user_nominations = db.session.execute(statement)
+
+def user_can_nominate(user, slot):
+    user_nominations = db.session.execute(nominations_per_round_statement(user.id))
     user_nominations_per_round = {n.round: int(n.count) for n in user_nominations}
 
     nominations_count = user_nominations_per_round.get(slot.round, 0)
@@ -63,41 +181,15 @@ def group_slots_by_round(slots):
 
 
 def players_from_fantrax_export(file, users):
-    with open(file) as f:
-        reader = csv.DictReader(f)
-        players = list()
-        short_name_to_user = {user.short_team_name: user.id for user in users}
-        for player in reader:
-            if player["Status"] == "FA":
-                salary = None
-                contract = None
-            else:
-                salary = int(float(player["Salary"]))
-                contract = int(player["Contract"])
-
-            # Optional: Match rights (team short name)
-            matcher_id = None
-            if "Match Rights" in player and player["Match Rights"]:
-                matcher_id = short_name_to_user.get(player["Match Rights"])
-
-            # Optional: Hometown discount (Yes/No, True/False, 1/0)
-            hometown_discount = False
-            if "Hometown Discount" in player and player["Hometown Discount"]:
-                hometown_discount = player["Hometown Discount"].strip().lower() in ["yes", "true", "1", "y"]
-
-            players.append(
-                Player(
-                    fantrax_id=player["ID"],
-                    name=player["Player"],
-                    team=player["Team"],
-                    position=player["Position"],
-                    salary=salary,
-                    contract=contract,
-                    manager_id=short_name_to_user.get(player["Status"]),
-                    matcher_id=matcher_id,
-                    hometown_discount=hometown_discount,
-                )
-            )
+    """Build players from a Fantrax export file, raising ValueError listing any invalid rows."""
+    with open(file, "rb") as f:
+        parser = FantraxExportParser(f, users)
+        players = [Player(**row._asdict()) for batch in parser for row in batch]
+
+    if parser.errors:
+        raise ValueError(
+            "Invalid Fantrax export: " + " ".join(f"Line {error.line}: {error.message}" for error in parser.errors)
+        )
 
     return players
 
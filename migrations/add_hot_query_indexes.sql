@@ -0,0 +1,26 @@
+-- Migration: Add indexes for the hot query predicates
+-- Date: 2026-10-17
+
+-- Bid lookups by user and nomination, and winner resolution per nomination
+CREATE INDEX IF NOT EXISTS ix_bid_user_id_nomination_id ON bid (user_id, nomination_id);
+CREATE INDEX IF NOT EXISTS ix_bid_nomination_id_value ON bid (nomination_id, value);
+
+-- Rosters, match rights and free agent lookups
+CREATE INDEX IF NOT EXISTS ix_player_manager_id ON player (manager_id);
+CREATE INDEX IF NOT EXISTS ix_player_matcher_id ON player (matcher_id);
+
+-- Nomination limits per manager
+CREATE INDEX IF NOT EXISTS ix_nomination_nominator_id ON nomination (nominator_id);
+
+-- Closing auctions and open nomination periods
+CREATE INDEX IF NOT EXISTS ix_slot_closes_at ON slot (closes_at);
+CREATE INDEX IF NOT EXISTS ix_slot_nomination_opens_at_nomination_closes_at ON slot (nomination_opens_at, nomination_closes_at);
+
+-- Pending notifications
+CREATE INDEX IF NOT EXISTS ix_notification_sent_send_at ON notification (sent, send_at);
+
+-- Audit log viewer (sensitive entries hidden, newest first)
+CREATE INDEX IF NOT EXISTS ix_audit_log_is_sensitive_created_at ON audit_log (is_sensitive, created_at);
+
+-- Refresh the query planner statistics
+ANALYZE;
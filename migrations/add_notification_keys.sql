@@ -0,0 +1,18 @@
+-- Migration: Add structured keys to the notification table
+-- Date: 2026-10-17
+
+-- Notification kind, the round or nomination it belongs to, and a unique key
+-- per kind and round/nomination so notifications can't be duplicated
+ALTER TABLE notification ADD COLUMN kind VARCHAR;
+ALTER TABLE notification ADD COLUMN round INTEGER;
+ALTER TABLE notification ADD COLUMN nomination_id INTEGER REFERENCES nomination (id) ON DELETE SET NULL;
+ALTER TABLE notification ADD COLUMN dedupe_key VARCHAR;
+
+CREATE INDEX IF NOT EXISTS ix_notification_kind ON notification (kind);
+CREATE INDEX IF NOT EXISTS ix_notification_round ON notification (round);
+CREATE INDEX IF NOT EXISTS ix_notification_nomination_id ON notification (nomination_id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_notification_dedupe_key ON notification (dedupe_key);
+
+-- Existing notifications keep NULL keys. Pending nomination period and match
+-- notifications created before this migration are no longer found by the
+-- remove helpers, so recreate any that are still pending after migrating.
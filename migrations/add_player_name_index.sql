@@ -0,0 +1,7 @@
+-- Migration: Add index for paging the player pool in name order
+-- Date: 2026-10-17
+
+CREATE INDEX IF NOT EXISTS ix_player_name_id ON player (name, id);
+
+-- Refresh the query planner statistics
+ANALYZE;
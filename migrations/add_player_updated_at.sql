@@ -0,0 +1,5 @@
+-- Migration: Add a last modified time to players for the search index fingerprint
+-- Date: 2026-10-17
+
+ALTER TABLE player ADD COLUMN updated_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_player_updated_at ON player (updated_at);
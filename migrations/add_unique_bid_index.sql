@@ -0,0 +1,11 @@
+-- Migration: Allow one bid per user per nomination, for the bid upsert
+-- Date: 2026-10-17
+
+-- Placeholder bids without a value, as deleted by flask prune-empty-bids
+DELETE FROM bid WHERE value IS NULL;
+
+-- Keep only the latest of each user's bids on a nomination
+DELETE FROM bid WHERE id NOT IN (SELECT max(id) FROM bid GROUP BY user_id, nomination_id);
+
+DROP INDEX IF EXISTS ix_bid_user_id_nomination_id;
+CREATE UNIQUE INDEX ix_bid_user_id_nomination_id ON bid (user_id, nomination_id);
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from auctioneer import create_app, db
+
+
+@pytest.fixture(scope="session")
+def _app(tmp_path_factory):
+    # create_app registers nested blueprints, so it can only run once per process
+    return create_app(
+        {
+            "TESTING": True,
+            # Set TEST_DATABASE_URL to run the suite against another database, e.g. Postgres.
+            # Its tables are dropped and recreated for every test.
+            "SQLALCHEMY_DATABASE_URI": os.environ.get("TEST_DATABASE_URL")
+            or f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.sqlite'}",
+            # Don't send wake-ups to a scheduler that may be running locally
+            "SCHEDULER_WAKE_ADDRESS": "",
+        }
+    )
+
+
+@pytest.fixture
+def app(_app):
+    """The app, inside an app context, with empty tables."""
+    with _app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        yield _app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,62 @@
+"""Builders for the rows most tests need. Each adds to the session without committing."""
+
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from auctioneer import db
+from auctioneer.model import Bid, Nomination, Player, Slot, User
+
+PASSWORD = "password"
+
+# One hashing round keeps user setup fast
+PASSWORD_HASH = generate_password_hash(PASSWORD, method="pbkdf2:sha256:1")
+
+
+def add_user(name, tiebreaker_order=None, is_league_manager=False):
+    user = User(
+        username=name,
+        password=PASSWORD_HASH,
+        team_name=f"Team {name}",
+        short_team_name=name[:3].upper(),
+        tiebreaker_order=tiebreaker_order,
+        is_league_manager=is_league_manager,
+    )
+    db.session.add(user)
+
+    return user
+
+
+def add_player(name, team="FA", position="SP", **columns):
+    player = Player(fantrax_id=f"*{name}*", name=name, team=team, position=position, **columns)
+    db.session.add(player)
+
+    return player
+
+
+def add_slot(closes_in=timedelta(hours=1), nomination_open=True, round=1):
+    now = datetime.utcnow()
+    nomination_delta = timedelta(hours=1) if nomination_open else -timedelta(hours=1)
+    slot = Slot(
+        round=round,
+        closes_at=now + closes_in,
+        nomination_opens_at=now - timedelta(hours=2),
+        nomination_closes_at=now + nomination_delta,
+    )
+    db.session.add(slot)
+
+    return slot
+
+
+def add_nomination(player, slot, nominator, bids=()):
+    """Add a nomination with (user, value) bids."""
+    nomination = Nomination(player=player, slot=slot, nominator_user=nominator)
+    nomination.bids.extend(Bid(user=user, value=value) for user, value in bids)
+    db.session.add(nomination)
+
+    return nomination
+
+
+def log_in(client, user):
+    response = client.post("/auth/login", data={"username": user.username, "password": PASSWORD})
+    assert response.status_code == 302, response.data
@@ -0,0 +1,64 @@
+import pytest
+import sqlalchemy
+
+from auctioneer import auth, db
+from auctioneer.model import User
+
+from helpers import add_user, log_in
+
+
+@pytest.fixture
+def user(app):
+    user = add_user("user", tiebreaker_order=1)
+    db.session.commit()
+    auth.invalidate_user_cache()
+    yield user
+    auth.invalidate_user_cache()
+
+
+def rename_in_another_process(user_id, team_name):
+    other_process = sqlalchemy.create_engine(db.engine.url)
+    with other_process.begin() as connection:
+        connection.execute(db.update(User).where(User.id == user_id).values(team_name=team_name))
+    other_process.dispose()
+
+
+def cached_team_name(user_id):
+    db.session.remove()
+    return auth.get_cached_user(user_id).team_name
+
+
+def test_static_files_do_not_load_the_user(client, user, monkeypatch):
+    log_in(client, user)
+    loaded = list()
+    get_cached_user = auth.get_cached_user
+    monkeypatch.setattr(auth, "get_cached_user", lambda user_id: loaded.append(user_id) or get_cached_user(user_id))
+
+    response = client.get("/static/style.css")
+    assert response.status_code == 200
+    response.close()
+    assert loaded == []
+
+    client.get("/")
+    assert loaded == [user.id]
+
+
+def test_cached_user_expires_after_the_ttl(user, monkeypatch):
+    user_id = user.id
+    assert cached_team_name(user_id) == "Team user"
+
+    rename_in_another_process(user_id, "Renamed elsewhere")
+    assert cached_team_name(user_id) == "Team user"
+
+    monkeypatch.setattr(auth, "USER_CACHE_TTL_SECONDS", 0)
+    assert cached_team_name(user_id) == "Renamed elsewhere"
+
+
+def test_cached_user_is_dropped_when_this_process_commits(user):
+    user_id = user.id
+    assert cached_team_name(user_id) == "Team user"
+
+    db.session.get(User, user_id).team_name = "Renamed here"
+    db.session.commit()
+
+    assert cached_team_name(user_id) == "Renamed here"
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from auctioneer import db
+from auctioneer.commands import prune_empty_bids
+from auctioneer.model import Bid
+from auctioneer.utils import get_winning_bids, set_user_bid
+
+from helpers import add_nomination, add_player, add_slot, add_user
+
+
+@pytest.fixture
+def nomination(app):
+    nominator = add_user("nominator", tiebreaker_order=1)
+    nomination = add_nomination(add_player("Player"), add_slot(), nominator, bids=[(nominator, 11)])
+    db.session.commit()
+
+    return nomination
+
+
+def bids(nomination):
+    return db.session.execute(
+        db.select(Bid.user_id, Bid.value).where(Bid.nomination_id == nomination.id).order_by(Bid.user_id)
+    ).all()
+
+
+def test_set_user_bid_inserts_updates_and_deletes(nomination):
+    bidder = add_user("bidder", tiebreaker_order=2)
+    db.session.commit()
+
+    set_user_bid(bidder.id, nomination.id, 20)
+    db.session.commit()
+    set_user_bid(bidder.id, nomination.id, 25)
+    db.session.commit()
+    assert bids(nomination) == [(nomination.nominator_id, 11), (bidder.id, 25)]
+
+    set_user_bid(bidder.id, nomination.id, None)
+    db.session.commit()
+    assert bids(nomination) == [(nomination.nominator_id, 11)]
+
+
+def test_a_user_has_one_bid_per_nomination(nomination):
+    db.session.add(Bid(user_id=nomination.nominator_id, nomination_id=nomination.id, value=12))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+
+
+def test_prune_empty_bids_removes_duplicates(nomination):
+    bidder = add_user("bidder", tiebreaker_order=2)
+    db.session.commit()
+    # Databases created before the unique index can hold several bids per user
+    db.session.execute(db.text("DROP INDEX ix_bid_user_id_nomination_id"))
+    db.session.execute(
+        db.insert(Bid),
+        [
+            {"user_id": bidder.id, "nomination_id": nomination.id, "value": 11},
+            {"user_id": bidder.id, "nomination_id": nomination.id, "value": 15},
+            {"user_id": bidder.id, "nomination_id": nomination.id, "value": None},
+        ],
+    )
+    db.session.commit()
+
+    assert prune_empty_bids() == (1, 1)
+    assert bids(nomination) == [(nomination.nominator_id, 11), (bidder.id, 15)]
+    assert get_winning_bids([nomination.id])[nomination.id].user_ids == [bidder.id]
+
+
+def test_get_winning_bids(app):
+    first, second, third, unordered = (
+        add_user("first", tiebreaker_order=1),
+        add_user("second", tiebreaker_order=2),
+        add_user("third", tiebreaker_order=3),
+        add_user("unordered"),
+    )
+    nominations = {
+        "single": add_nomination(add_player("Single"), add_slot(), first, bids=[(first, 11)]),
+        "outbid": add_nomination(
+            add_player("Outbid"), add_slot(), first, bids=[(first, 11), (second, 20), (third, 15), (unordered, 15)]
+        ),
+        "tied": add_nomination(
+            add_player("Tied"), add_slot(), third, bids=[(unordered, 30), (third, 30), (first, 30), (second, 12)]
+        ),
+        "withdrawn": add_nomination(add_player("Withdrawn"), add_slot(), first, bids=[(first, None), (second, 14)]),
+        "empty": add_nomination(add_player("Empty"), add_slot(), first, bids=[(first, None)]),
+    }
+    db.session.commit()
+
+    winning_bids = get_winning_bids([nomination.id for nomination in nominations.values()])
+
+    assert winning_bids == {
+        nominations["single"].id: (11, [first.id], None),
+        nominations["outbid"].id: (20, [second.id], 15),
+        nominations["tied"].id: (30, [first.id, third.id, unordered.id], 30),
+        nominations["withdrawn"].id: (14, [second.id], None),
+    }
+    assert get_winning_bids([]) == {}
@@ -0,0 +1,56 @@
+import math
+import random
+
+import pytest
+
+from auctioneer.contracts import HOMETOWN_DISCOUNT, ContractOptionsTable
+
+
+def old_options(minimum_total_salary, bid_value):
+    """The per-view loop the bid and sign views used before the tables."""
+    last_year = list(minimum_total_salary)[0] - 1
+    options = dict()
+    for year, salary in minimum_total_salary.items():
+        if bid_value >= salary:
+            options[year] = math.ceil(bid_value / (year - last_year))
+
+    return options
+
+
+def old_min_contracts(minimum_total_salary):
+    last_year = list(minimum_total_salary)[0] - 1
+    return {
+        year: {"total": min_salary, "annual": math.ceil(min_salary / (year - last_year))}
+        for year, min_salary in minimum_total_salary.items()
+    }
+
+
+def minimum_total_salaries():
+    yield {2026: 11}
+    yield {2026: 12, 2027: 30, 2028: 60, 2029: 100, 2030: 150}
+    # Thresholds needn't grow with contract length, and may repeat
+    yield {2026: 20, 2027: 15, 2028: 15, 2029: 40}
+    rng = random.Random(0)
+    for _ in range(5):
+        yield {2026 + i: rng.randrange(1, 200) for i in range(rng.randrange(1, 11))}
+
+
+@pytest.mark.parametrize("minimum_total_salary", minimum_total_salaries())
+@pytest.mark.parametrize("hometown_discount", [False, True])
+def test_options_match_the_per_view_loop(minimum_total_salary, hometown_discount):
+    if hometown_discount:
+        minimum_total_salary = {year: round(salary * HOMETOWN_DISCOUNT) for year, salary in minimum_total_salary.items()}
+    table = ContractOptionsTable(minimum_total_salary)
+
+    assert table.min_contracts == old_min_contracts(minimum_total_salary)
+    for bid_value in range(0, max(minimum_total_salary.values()) + 10):
+        # Compare as lists, as the templates list options in dict order
+        assert list(table.options(bid_value).items()) == list(old_options(minimum_total_salary, bid_value).items())
+
+
+def test_empty_config_has_no_options():
+    table = ContractOptionsTable({})
+
+    assert table.min_contracts == {}
+    assert table.options(100) == {}
+    assert ContractOptionsTable({2026: 11}).options(None) == {}
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import event
+
+from auctioneer import db, discord, slack
+from auctioneer.commands import build_payloads, send_notifications
+from auctioneer.delivery import deliver
+from auctioneer.model import Notification
+from auctioneer.notifications import AUCTION_MATCH, PLAYER_NOMINATED
+
+
+class Webhook:
+    """Local webhook that records each request and answers with respond(payload)."""
+
+    def __init__(self):
+        self.requests = list()  # (monotonic time, payload)
+        self.respond = lambda payload: (204, {}, b"")
+        self._lock = threading.Lock()
+
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with webhook._lock:
+                    webhook.requests.append((time.monotonic(), payload))
+                status, headers, body = webhook.respond(payload)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+
+
+@pytest.fixture
+def webhook():
+    webhook = Webhook()
+    thread = threading.Thread(target=webhook.server.serve_forever, daemon=True)
+    thread.start()
+    yield webhook
+    webhook.server.shutdown()
+    webhook.server.server_close()
+
+
+def add_notifications(*messages, kind=AUCTION_MATCH):
+    notifications = [
+        Notification(
+            kind=kind,
+            title="Match",
+            message=message,
+            # Past the digest window, so digest kinds are due as well
+            send_at=datetime.utcnow() - timedelta(hours=1),
+        )
+        for message in messages
+    ]
+    db.session.add_all(notifications)
+    db.session.commit()
+
+    return [notification.id for notification in notifications]
+
+
+@pytest.mark.parametrize(
+    "headers, body",
+    [
+        ({"Content-Type": "application/json"}, json.dumps({"retry_after": 0.3}).encode()),  # Discord
+        ({"Retry-After": "0.3"}, b""),  # Slack
+    ],
+)
+def test_deliver_waits_for_retry_after(app, webhook, headers, body):
+    responses = iter([(429, headers, body)])
+    webhook.respond = lambda payload: next(responses, (204, {}, b""))
+
+    delivered = deliver({1: {"content": "a"}}, webhook.url, max_workers=1)
+
+    assert delivered == [1]
+    assert len(webhook.requests) == 2
+    assert webhook.requests[1][0] - webhook.requests[0][0] >= 0.3
+
+
+def test_deliver_backs_off_every_worker(app, webhook):
+    rate_limited = threading.Event()
+
+    def respond(payload):
+        if payload["content"] == "first" and not rate_limited.is_set():
+            rate_limited.set()
+            return 429, {"Content-Type": "application/json"}, json.dumps({"retry_after": 0.3}).encode()
+        return 204, {}, b""
+
+    webhook.respond = respond
+
+    delivered = deliver({key: {"content": key} for key in ["first", "second", "third"]}, webhook.url, max_workers=1)
+
+    assert sorted(delivered) == ["first", "second", "third"]
+    limited_at = webhook.requests[0][0]
+    assert all(requested_at - limited_at >= 0.3 for requested_at, _ in webhook.requests[1:])
+
+
+def test_send_notifications_marks_only_delivered_sent(app, webhook):
+    ids = add_notifications("one", "fails", "three")
+    webhook.respond = lambda payload: (500, {}, b"error") if "fails" in payload["content"] else (204, {}, b"")
+
+    sent = send_notifications(webhook.url, discord)
+
+    assert sorted(notification.id for notification in sent) == [ids[0], ids[2]]
+    db.session.expire_all()
+    assert {notification.id: notification.sent for notification in db.session.execute(db.select(Notification)).scalars()} == {
+        ids[0]: True,
+        ids[1]: False,
+        ids[2]: True,
+    }
+
+
+def test_send_notifications_marks_sent_in_one_update(app, webhook):
+    add_notifications("one", "two", "three")
+    statements = list()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        sent = send_notifications(webhook.url, discord)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert len(sent) == 3
+    updates = [statement for statement in statements if statement.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 1
+    assert "notification" in updates[0]
+
+
+def nominated_messages(count):
+    return [f"**Team {i % 12}** has nominated Player Number {i:03d} (SP, RP, NYY)" for i in range(count)]
+
+
+def payload_text(notification_module, payload):
+    if notification_module is discord:
+        return payload["content"]
+    return payload["blocks"][2]["text"]["text"]
+
+
+@pytest.mark.parametrize("notification_module", [discord, slack], ids=["discord", "slack"])
+def test_digest_chunks_fit_the_message_limit(app, notification_module):
+    ids = add_notifications(*nominated_messages(200), kind=PLAYER_NOMINATED)
+    notifications = db.session.execute(db.select(Notification).order_by(Notification.id)).scalars().all()
+
+    payloads = build_payloads(notifications, notification_module, datetime.utcnow())
+
+    assert len(payloads) > 1
+    assert sorted(id for payload_ids in payloads for id in payload_ids) == ids
+    for payload_ids, payload in payloads.items():
+        text = payload_text(notification_module, payload)
+        assert len(text) <= notification_module.MESSAGE_LIMIT
+        messages = [notification.message for notification in notifications if notification.id in payload_ids]
+        assert all(message in text for message in messages)
+
+
+def test_failed_digest_chunk_is_not_marked_sent(app, webhook):
+    messages = nominated_messages(200)
+    add_notifications(*messages, kind=PLAYER_NOMINATED)
+    failing_message = messages[100]
+    webhook.respond = lambda payload: (500, {}, b"error") if failing_message in payload["content"] else (204, {}, b"")
+
+    sent = send_notifications(webhook.url, discord)
+
+    failed_chunk = next(payload for _, payload in webhook.requests if failing_message in payload["content"])
+    unsent = db.session.execute(db.select(Notification.message).where(Notification.sent.is_(False))).scalars().all()
+    assert len(webhook.requests) > 1
+    assert unsent and all(message in failed_chunk["content"] for message in unsent)
+    assert len(unsent) == failed_chunk["content"].count("has nominated")
+    assert len(sent) + len(unsent) == len(messages)
+    assert not any(notification.message in failed_chunk["content"] for notification in sent)
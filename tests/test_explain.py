@@ -0,0 +1,27 @@
+import pytest
+
+from auctioneer import db
+from auctioneer.explain import _full_scans, explain_hot_queries
+
+
+def test_hot_queries_use_indexes(app):
+    if db.engine.dialect.name != "sqlite":
+        pytest.skip("TEST_DATABASE_URL is not a SQLite database")
+
+    results = explain_hot_queries()
+
+    assert results
+    assert {name: full_scans for name, _, full_scans in results if full_scans} == {}
+
+
+def test_full_scans_only_counts_tables():
+    details = [
+        "CO-ROUTINE (subquery-1)",
+        "SCAN bid",
+        "SCAN (subquery-1)",
+        "SCAN CONSTANT ROW",
+        "SCAN slot USING INDEX ix_slot_closes_at",
+        "SCAN TABLE player",
+    ]
+
+    assert _full_scans(details) == {"bid", "player"}
@@ -0,0 +1,193 @@
+import gzip
+import io
+from collections import namedtuple
+
+import pytest
+
+from auctioneer import db
+from auctioneer.importer import FantraxExportParser, PlayerRow, RowError, upsert_players
+from auctioneer.model import Bid, Nomination, Player
+from auctioneer.utils import players_from_fantrax_export
+
+from helpers import add_nomination, add_slot, add_user
+
+
+def player_row(fantrax_id, name, team="NYY", salary=None, contract=None, manager_id=None):
+    return PlayerRow(fantrax_id, name, team, "SP", salary, contract, manager_id, None, False)
+
+
+def players():
+    return {
+        player.fantrax_id: player
+        for player in db.session.execute(db.select(Player).execution_options(populate_existing=True)).scalars()
+    }
+
+
+@pytest.fixture
+def manager(app):
+    manager = add_user("manager", tiebreaker_order=1)
+    db.session.commit()
+
+    return manager
+
+
+def test_upsert_keeps_ids_nominations_and_bids(manager):
+    upsert_players([[player_row("a", "Alpha"), player_row("b", "Beta")]])
+    db.session.commit()
+    ids = {fantrax_id: player.id for fantrax_id, player in players().items()}
+    add_nomination(players()["a"], add_slot(), manager, bids=[(manager, 15)])
+    db.session.commit()
+
+    result = upsert_players([[player_row("a", "Alpha Renamed", team="BOS"), player_row("b", "Beta"), player_row("c", "Gamma")]])
+    db.session.commit()
+
+    assert (result.inserted, result.updated, result.unchanged) == (1, 1, 1)
+    current = players()
+    assert {fantrax_id: player.id for fantrax_id, player in current.items() if fantrax_id in ids} == ids
+    assert (current["a"].name, current["a"].team) == ("Alpha Renamed", "BOS")
+    nomination = db.session.execute(db.select(Nomination)).scalar_one()
+    assert nomination.player_id == ids["a"]
+    assert db.session.execute(db.select(Bid.nomination_id, Bid.value)).all() == [(nomination.id, 15)]
+
+
+@pytest.mark.parametrize("update_rosters", [False, True])
+def test_upsert_updates_rosters_only_when_asked(manager, update_rosters):
+    upsert_players([[player_row("a", "Alpha", salary=10, contract=2027, manager_id=manager.id)]])
+    db.session.commit()
+
+    result = upsert_players(
+        [[player_row("a", "Alpha", salary=25, contract=2029), player_row("b", "Beta", salary=5, contract=2026)]],
+        update_rosters=update_rosters,
+    )
+    db.session.commit()
+
+    current = players()
+    expected = (25, 2029, None) if update_rosters else (10, 2027, manager.id)
+    assert (current["a"].salary, current["a"].contract, current["a"].manager_id) == expected
+    assert (result.updated, result.unchanged) == ((1, 0) if update_rosters else (0, 1))
+    # New players always get every column
+    assert (current["b"].salary, current["b"].contract) == (5, 2026)
+
+
+def test_upsert_deletes_missing_players_except_nominated(manager):
+    upsert_players([[player_row(fantrax_id, fantrax_id.upper()) for fantrax_id in "abcd"]])
+    db.session.commit()
+    add_nomination(players()["b"], add_slot(), manager, bids=[(manager, 15)])
+    db.session.commit()
+
+    result = upsert_players([[player_row("a", "A")]], delete_missing=True)
+    db.session.commit()
+
+    assert (result.deleted, result.kept) == (2, 1)
+    assert sorted(players()) == ["a", "b"]
+
+
+def test_upsert_without_delete_missing_keeps_players(manager):
+    upsert_players([[player_row("a", "A"), player_row("b", "B")]])
+    db.session.commit()
+
+    result = upsert_players([[player_row("a", "A")]])
+    db.session.commit()
+
+    assert (result.deleted, result.kept) == (0, 0)
+    assert sorted(players()) == ["a", "b"]
+
+
+Team = namedtuple("Team", ["id", "short_team_name"])
+
+TEAMS = [Team(1, "ABC"), Team(2, "XYZ")]
+
+EXPORT = (
+    # Spreadsheet exports often start with a byte order mark
+    "\ufeffID,Player,Team,Position,Status,Salary,Contract,Match Rights,Hometown Discount\r\n"
+    "*a*,Alpha,NYY,SP,ABC,10,2027,,Yes\r\n"
+    "*b*,Beta,BOS,\"RP,SP\",FA,,,XYZ,\r\n"
+    ",,,,,,,,\r\n"
+    "*c*,Gamma,LAD,C,XYZ,3.0,2026,,no\r\n"
+).encode()
+
+EXPECTED_ROWS = [
+    PlayerRow("*a*", "Alpha", "NYY", "SP", 10, 2027, 1, None, True),
+    PlayerRow("*b*", "Beta", "BOS", "RP,SP", None, None, None, 2, False),
+    PlayerRow("*c*", "Gamma", "LAD", "C", 3, 2026, 2, None, False),
+]
+
+
+class ReadOnlyStream:
+    """A stream with nothing but read(), like an upload that can't seek or peek."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
+
+@pytest.mark.parametrize(
+    "data", [EXPORT, gzip.compress(EXPORT)], ids=["plain", "gzip"]
+)
+@pytest.mark.parametrize("stream_type", [io.BytesIO, ReadOnlyStream])
+def test_parser_reads_plain_and_gzipped_exports(data, stream_type):
+    parser = FantraxExportParser(stream_type(data), TEAMS, batch_size=2)
+
+    batches = list(parser)
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [row for batch in batches for row in batch] == EXPECTED_ROWS
+    assert (parser.row_count, parser.errors) == (3, [])
+
+
+def test_parser_reports_every_invalid_row():
+    data = (
+        "ID,Player,Team,Position,Status,Salary,Contract,Match Rights\n"
+        "*a*,Alpha,NYY,SP,ABC,ten,2027,\n"
+        "*b*,,BOS,RP,FA,,,QQQ\n"
+        "*a*,Alpha Again,NYY,SP,FA,,,\n"
+        "*d*,Delta,SEA,1B,XYZ,4,2028,\n"
+    ).encode()
+    parser = FantraxExportParser(io.BytesIO(gzip.compress(data)), TEAMS)
+
+    rows = [row for batch in parser for row in batch]
+
+    assert [row.fantrax_id for row in rows] == ["*d*"]
+    assert parser.errors == [
+        RowError(2, "*a*", "Salary 'ten' is not a number."),
+        RowError(3, "*b*", "Player name is required."),
+        RowError(3, "*b*", "Match Rights 'QQQ' is not a team."),
+        RowError(4, "*a*", "ID appears more than once in the file."),
+    ]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"", "File is empty."),
+        (b"ID,Player,Team\n*a*,Alpha,NYY\n", "Missing required columns: Position, Status, Salary, Contract."),
+    ],
+)
+def test_parser_rejects_malformed_files(data, message):
+    parser = FantraxExportParser(io.BytesIO(data), TEAMS)
+
+    assert list(parser) == []
+    assert parser.errors == [RowError(1, None, message)]
+
+
+def test_players_from_fantrax_export(tmp_path):
+    path = tmp_path / "export.csv.gz"
+    path.write_bytes(gzip.compress(EXPORT))
+
+    players = players_from_fantrax_export(path, TEAMS)
+
+    assert [(player.fantrax_id, player.salary, player.manager_id) for player in players] == [
+        ("*a*", 10, 1),
+        ("*b*", None, None),
+        ("*c*", 3, 2),
+    ]
+
+
+def test_players_from_fantrax_export_raises_for_invalid_rows(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_bytes(EXPORT + b"*e*,Epsilon,CHC,SS,ABC,,2027,,\r\n")
+
+    with pytest.raises(ValueError, match=r"^Invalid Fantrax export: Line 6: Salary '' is not a number\.$"):
+        players_from_fantrax_export(path, TEAMS)
@@ -0,0 +1,43 @@
+from auctioneer import db
+from auctioneer.model import Nomination, Notification
+from auctioneer.notifications import PLAYER_NOMINATED
+
+from helpers import add_player, add_slot, add_user, log_in
+
+
+def nominated_notifications():
+    return db.session.execute(
+        db.select(Notification.nomination_id, Notification.message, Notification.sent)
+        .where(Notification.kind == PLAYER_NOMINATED)
+        .order_by(Notification.id)
+    ).all()
+
+
+def test_renomination_after_delete_is_announced(app, client):
+    admin = add_user("admin", tiebreaker_order=1, is_league_manager=True)
+    manager = add_user("manager", tiebreaker_order=2)
+    first, second = add_player("First Player"), add_player("Second Player")
+    add_slot()
+    add_slot()
+    db.session.commit()
+
+    log_in(client, admin)
+    assert client.post("/nominate/", data={"player_id": first.id, "bid_value": 20}).status_code == 302
+    nomination_id = db.session.execute(db.select(Nomination.id)).scalar_one()
+    db.session.execute(db.update(Notification).values(sent=True))
+    db.session.commit()
+
+    response = client.post(
+        f"/{nomination_id}/edit/", data={"slot_id": "", "winner_id": "", "action": "delete"}
+    )
+    assert response.status_code == 302
+
+    client.get("/auth/logout")
+    log_in(client, manager)
+    assert client.post("/nominate/", data={"player_id": second.id, "bid_value": 20}).status_code == 302
+
+    # SQLite hands the deleted nomination's id out again
+    assert db.session.execute(db.select(Nomination.id)).scalar_one() == nomination_id
+    assert [(row.nomination_id, "Second Player" in row.message, row.sent) for row in nominated_notifications()] == [
+        (nomination_id, True, False)
+    ]
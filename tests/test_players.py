@@ -0,0 +1,75 @@
+import html
+import re
+
+import pytest
+
+from auctioneer import db, players as players_module
+
+from helpers import add_player, add_user, log_in
+
+NAMES = ["Will Smith", "Luis Garcia", "Will Smith", "Aaron Nola", "Luis Garcia", "Will Smith", "Zack Wheeler"]
+
+
+def page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    ids = [int(id) for id in re.findall(r'href="/admin/players/(\d+)/edit/"', body)]
+    links = {label: html.unescape(href) for href, label in re.findall(r'<a href="([^"]+)">(← Previous|Next →)</a>', body)}
+
+    return ids, links
+
+
+def walk(client, url, direction):
+    """Follow the direction's links from url, returning every page's player ids in name order."""
+    pages = list()
+    while url is not None:
+        ids, links = page(client, url)
+        pages.append(ids)
+        url = links.get(direction)
+
+    return [id for ids in (pages if direction == "Next →" else reversed(pages)) for id in ids], links
+
+
+@pytest.fixture
+def pool(app, client, monkeypatch):
+    monkeypatch.setattr(players_module, "PER_PAGE", 2)
+    admin = add_user("admin", tiebreaker_order=1, is_league_manager=True)
+    db.session.flush()
+    pool = list()
+    for i in range(3):
+        for j, name in enumerate(NAMES):
+            position = "SP" if (i + j) % 2 else "2B,SS"
+            manager_id = admin.id if (i + j) % 3 == 0 else None
+            pool.append(add_player(name, team="NYY", position=position, manager_id=manager_id))
+    # fantrax_id must be unique; add_player derives it from the name
+    for i, player in enumerate(pool):
+        player.fantrax_id = f"*{i}*"
+    db.session.commit()
+    log_in(client, admin)
+
+    return pool
+
+
+@pytest.mark.parametrize(
+    "filters, matches",
+    [
+        ("", lambda player: True),
+        ("status=fa", lambda player: player.manager_id is None),
+        ("position=SS", lambda player: "SS" in player.position.split(",")),
+        ("status=fa&position=SP&name=smith", lambda player: player.manager_id is None and player.position == "SP" and "Smith" in player.name),
+    ],
+)
+def test_pages_cover_every_player_once_in_order(client, pool, filters, matches):
+    expected = [player.id for player in sorted(pool, key=lambda player: (player.name, player.id)) if matches(player)]
+
+    forward, _ = walk(client, f"/admin/players/?{filters}", "Next →")
+    assert forward == expected
+
+    # Walk back from the last page
+    last_page = f"/admin/players/?{filters}"
+    while "Next →" in page(client, last_page)[1]:
+        last_page = page(client, last_page)[1]["Next →"]
+    backward, first_links = walk(client, last_page, "← Previous")
+    assert backward == expected
+    assert "← Previous" not in first_links
@@ -0,0 +1,94 @@
+import json
+import random
+
+import pytest
+
+from auctioneer import db, projections
+from auctioneer.config import bump_config_version
+from auctioneer.model import Config, Player
+
+from helpers import add_player, add_user
+
+
+def old_team_salary(salary_cap, players):
+    """The per-team, per-year loop the roster page used before projections."""
+    team_salary = {year: {"salary": 0, "players": 0} for year in salary_cap}
+    min_year = min(salary_cap)
+    max_year = max(salary_cap)
+    for player in players:
+        if player.contract is None:
+            continue
+        year = min_year
+        while year <= player.contract and year <= max_year:
+            team_salary[year]["salary"] += player.salary
+            team_salary[year]["players"] += 1
+            year += 1
+
+    return team_salary
+
+
+def set_salary_cap(salary_cap):
+    db.session.add(Config(key="SALARY_CAP", value=json.dumps(salary_cap), value_type="json"))
+    bump_config_version(seed=1)
+    db.session.commit()
+
+
+@pytest.fixture(autouse=True)
+def fresh_projection(app):
+    projections.invalidate_salary_projection()
+    yield
+    projections.invalidate_salary_projection()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_projection_matches_the_per_year_loop(seed):
+    rng = random.Random(seed)
+    salary_cap = {str(year): rng.randrange(200, 300) for year in range(2026, 2031)}
+    set_salary_cap(salary_cap)
+    teams = [add_user(f"team{i}", tiebreaker_order=i) for i in range(4)]
+    db.session.flush()
+    for i in range(60):
+        manager = rng.choice(teams + [None])
+        add_player(
+            f"Player {i}",
+            manager_id=manager and manager.id,
+            salary=rng.randrange(1, 40),
+            contract=rng.choice([None, 2024, 2025, 2026, 2027, 2028, 2030, 2031, 2035]),
+        )
+    db.session.commit()
+
+    projection = projections.get_salary_projection()
+
+    caps = {int(year): cap for year, cap in salary_cap.items()}
+    for team in teams:
+        players = db.session.execute(db.select(Player).where(Player.manager_id == team.id)).scalars()
+        expected = old_team_salary(caps, players)
+        for year, cap in caps.items():
+            expected[year].update(cap=cap, cap_space=cap - expected[year]["salary"])
+        assert projection.for_team(team.id) == expected
+
+
+def test_projection_skips_years_missing_from_the_salary_cap():
+    projection = projections.SalaryProjection(
+        {2026: 100, 2028: 100, 2029: 100},
+        [(1, 5, 2025), (1, 10, 2026), (1, 20, 2027), (1, 40, 2028), (1, 80, 2035)],
+        key=None,
+    )
+
+    assert projection.salary[1] == [150, 120, 80]
+    assert projection.players[1] == [4, 2, 1]
+
+
+def test_fingerprint_is_checked_at_most_once_per_interval(monkeypatch):
+    set_salary_cap({"2026": 100})
+    checks = list()
+    get_fingerprint = projections._get_fingerprint
+    monkeypatch.setattr(projections, "_get_fingerprint", lambda: checks.append(1) or get_fingerprint())
+
+    projection = projections.get_salary_projection()
+    assert projections.get_salary_projection() is projection
+    assert len(checks) == 1
+
+    monkeypatch.setattr(projections, "FINGERPRINT_CHECK_SECONDS", 0)
+    assert projections.get_salary_projection() is projection
+    assert len(checks) == 2
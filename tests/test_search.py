@@ -0,0 +1,48 @@
+import pytest
+import sqlalchemy
+
+from auctioneer import db, search
+from auctioneer.model import Player
+
+from helpers import add_player
+
+
+@pytest.fixture
+def players(app):
+    players = [add_player("Aaron Judge", team="NYY", position="OF"), add_player("Gerrit Cole", team="NYY")]
+    db.session.commit()
+    search.invalidate_player_index()
+    yield players
+    search.invalidate_player_index()
+
+
+def names(query):
+    return [player.name for player in search.search_players(query)]
+
+
+def test_index_rebuilds_after_another_process_edits_a_player(players, monkeypatch):
+    monkeypatch.setattr(search, "FINGERPRINT_CHECK_SECONDS", 0)
+    assert names("judge") == ["Aaron Judge"]
+
+    other_process = sqlalchemy.create_engine(db.engine.url)
+    with other_process.begin() as connection:
+        connection.execute(db.update(Player).where(Player.id == players[0].id).values(name="Aaron Justice"))
+    other_process.dispose()
+    db.session.commit()
+
+    assert names("judge") == []
+    assert names("justice") == ["Aaron Justice"]
+
+
+def test_fingerprint_is_checked_at_most_once_per_interval(players, monkeypatch):
+    checks = list()
+    get_fingerprint = search._get_fingerprint
+    monkeypatch.setattr(search, "_get_fingerprint", lambda: checks.append(1) or get_fingerprint())
+
+    for _ in range(3):
+        assert names("cole") == ["Gerrit Cole"]
+    assert len(checks) == 1
+
+    monkeypatch.setattr(search, "FINGERPRINT_CHECK_SECONDS", 0)
+    assert names("cole") == ["Gerrit Cole"]
+    assert len(checks) == 2
@@ -0,0 +1,83 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from auctioneer import db
+from auctioneer.auction import close_nomination
+from auctioneer.commands import close_nominations
+from auctioneer.model import Nomination, Player, Slot, User
+
+from helpers import add_nomination, add_player, add_slot, add_user
+
+USERS = 6
+NOMINATIONS = 10
+
+
+def expected_results(orders, auctions):
+    """Settle auctions one at a time with the original close_nomination rules.
+
+    Args:
+        orders: Dict of user -> tiebreaker order
+        auctions: List of (player, bids) in closing order, bids a list of (user, value)
+
+    Returns:
+        Dict of player -> (winner, winning value), and the final orders
+    """
+    orders = dict(orders)
+    results = dict()
+    for player, bids in auctions:
+        value = max(value for _, value in bids)
+        winners = [user for user, bid_value in bids if bid_value == value]
+        winner = min(winners, key=orders.get)
+        if len(winners) > 1:
+            below = [user for user in orders if orders[user] > orders[winner]]
+            if below:
+                bottom = max(orders[user] for user in below)
+                for user in below:
+                    orders[user] -= 1
+                orders[winner] = bottom
+        results[player] = (winner, value)
+
+    return results, orders
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("one_at_a_time", [False, True], ids=["batch", "one-at-a-time"])
+def test_settlement_matches_closing_one_at_a_time(app, seed, one_at_a_time):
+    rng = random.Random(seed)
+    user_order = list(range(1, USERS + 1))
+    rng.shuffle(user_order)
+    users = [add_user(f"user{i}", tiebreaker_order=order) for i, order in enumerate(user_order)]
+
+    auctions = list()
+    for i in range(NOMINATIONS):
+        # Few distinct values, so most auctions end in a tie
+        bidders = rng.sample(users, rng.randint(1, USERS))
+        bids = [(user, rng.choice([20, 25])) for user in bidders]
+        player = add_player(f"Player {i}")
+        slot = add_slot(closes_in=-timedelta(hours=NOMINATIONS - i), nomination_open=False)
+        add_nomination(player, slot, bidders[0], bids=bids)
+        auctions.append((player.name, [(user.username, value) for user, value in bids]))
+    db.session.commit()
+
+    expected, expected_orders = expected_results({user.username: user.tiebreaker_order for user in users}, auctions)
+
+    nominations = db.session.execute(db.select(Nomination).join(Slot).order_by(Slot.closes_at)).scalars().all()
+    if one_at_a_time:
+        for nomination in nominations:
+            close_nomination(nomination)
+    else:
+        assert len(close_nominations()) == NOMINATIONS
+
+    db.session.expire_all()
+    winners = dict(
+        db.session.execute(db.select(Player.name, User.username).join(User, Player.manager_id == User.id)).all()
+    )
+    winning_values = {nomination.player.name: nomination.bids[0].value for nomination in nominations}
+    orders = dict(db.session.execute(db.select(User.username, User.tiebreaker_order)).all())
+
+    assert {name: (winners[name], winning_values[name]) for name in winners} == expected
+    assert orders == expected_orders
+    # The scenario must chain several tiebreaker drops for the comparison to mean anything
+    assert sum(sum(value == max(dict(bids).values()) for _, value in bids) > 1 for _, bids in auctions) > 1
@@ -0,0 +1,74 @@
+import gzip
+import os
+
+import pytest
+from flask import url_for
+
+from auctioneer import static
+
+STYLE = b"body { margin: 0; }\n" * 40
+SCRIPT = b"console.log(1);\n"
+IMAGE = b"\x89PNG" + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    (tmp_path / "style.css").write_bytes(STYLE)
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "logo.png").write_bytes(IMAGE)
+
+    return tmp_path
+
+
+def read(folder, path):
+    with open(os.path.join(folder, path), "rb") as file:
+        return file.read()
+
+
+def test_build_assets_writes_fingerprinted_copies(static_folder):
+    manifest = static.build_assets(str(static_folder))
+
+    assert sorted(manifest) == ["js/app.js", "logo.png", "style.css"]
+    for name, path in manifest.items():
+        stem, extension = os.path.splitext(name)
+        assert path.startswith(f"build/{stem}.") and path.endswith(extension)
+        assert read(static_folder, path) == read(static_folder, name)
+    assert (static_folder / "build" / "manifest.json").exists()
+
+    # Only big, uncompressed files get precompressed variants
+    assert gzip.decompress(read(static_folder, manifest["style.css"] + ".gz")) == STYLE
+    assert not os.path.exists(static_folder / (manifest["js/app.js"] + ".gz"))
+    assert not os.path.exists(static_folder / (manifest["logo.png"] + ".gz"))
+
+
+def test_build_assets_is_repeatable_and_replaces_old_builds(static_folder):
+    first = static.build_assets(str(static_folder))
+    gzipped = read(static_folder, first["style.css"] + ".gz")
+
+    (static_folder / "style.css").write_bytes(STYLE + b"a { color: red; }\n")
+    second = static.build_assets(str(static_folder))
+
+    assert second["js/app.js"] == first["js/app.js"]
+    assert second["style.css"] != first["style.css"]
+    assert not os.path.exists(static_folder / first["style.css"])
+
+    (static_folder / "style.css").write_bytes(STYLE)
+    assert static.build_assets(str(static_folder)) == first
+    assert read(static_folder, first["style.css"] + ".gz") == gzipped
+
+
+def test_url_for_uses_fingerprinted_names(app, static_folder, monkeypatch):
+    monkeypatch.setitem(app.config, "STATIC_FOLDER", str(static_folder))
+    monkeypatch.setattr(static, "_manifest", None)
+
+    with app.test_request_context():
+        assert url_for("static", filename="style.css") == "/static/style.css"
+
+    manifest = static.build_assets(str(static_folder))
+    monkeypatch.setattr(static, "_manifest", None)
+
+    with app.test_request_context():
+        assert url_for("static", filename="style.css") == f"/static/{manifest['style.css']}"
+        assert url_for("static.staticfiles", filename="js/app.js") == f"/static/{manifest['js/app.js']}"
+        assert url_for("static", filename="missing.css") == "/static/missing.css"
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from auctioneer import db
+from auctioneer.model import User
+from auctioneer.tiebreaker import apply_tiebreaker_permutation, drop_to_tiebreaker_bottom
+
+from helpers import add_user
+
+
+def old_drop_to_bottom(orders, user_id):
+    """The row-by-row drop used before the set-based UPDATEs, on a dict of orders."""
+    orders = dict(orders)
+    updates = dict()
+    max_tiebreaker_order = 0
+    for uid, order in orders.items():
+        if order is not None and order > orders[user_id]:
+            max_tiebreaker_order = max(max_tiebreaker_order, order)
+            updates[uid] = order - 1
+    if updates:
+        updates[user_id] = max_tiebreaker_order
+    orders.update(updates)
+
+    return orders
+
+
+def stored_orders():
+    db.session.expire_all()
+    return dict(db.session.execute(db.select(User.id, User.tiebreaker_order)).all())
+
+
+def add_users(orders):
+    users = [add_user(f"user{i}", tiebreaker_order=order) for i, order in enumerate(orders)]
+    db.session.commit()
+
+    return users
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_drop_to_bottom_matches_the_row_by_row_drop(app, seed):
+    rng = random.Random(seed)
+    # Gaps and users without an order, as admins leave them
+    orders = rng.sample(range(1, 20), 8) + [None, None]
+    rng.shuffle(orders)
+    users = add_users(orders)
+
+    for user in rng.sample([user for user in users if user.tiebreaker_order is not None], 4):
+        expected = old_drop_to_bottom(stored_orders(), user.id)
+        drop_to_tiebreaker_bottom(user)
+        assert stored_orders() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_permutation_applies_every_new_order(app, seed):
+    rng = random.Random(seed)
+    users = add_users(range(1, 9))
+    moved = rng.sample(users, 5)
+    new_orders = [user.tiebreaker_order for user in moved]
+    rng.shuffle(new_orders)
+    new_orders[0] = None
+    permutation = {user.id: order for user, order in zip(moved, new_orders)}
+
+    expected = {**stored_orders(), **permutation}
+    apply_tiebreaker_permutation(permutation)
+    # Users loaded in the session are brought up to date
+    assert {user.id: user.tiebreaker_order for user in moved} == permutation
+    db.session.commit()
+
+    assert stored_orders() == expected
+
+
+def test_permutation_rejects_an_order_held_by_another_user(app):
+    first, second, _ = add_users([1, 2, 3])
+
+    with pytest.raises(IntegrityError):
+        apply_tiebreaker_permutation({first.id: 3, second.id: 1})